@@ -1,12 +1,14 @@
 
 """Billing API routes (PostgreSQL async)."""
 
+from typing import Any
+
 from fastapi import APIRouter, Depends
 
 from app.api.deps import BillingSvc, get_current_user
 from app.core.config import settings
 from app.db.models.user import User
-from app.schemas.billing import BillingCreditPack, BillingSummary, CheckoutRequest, CheckoutResponse
+from app.schemas.billing import BillingSummary, CheckoutRequest, CheckoutResponse
 
 router = APIRouter()
 
@@ -15,18 +17,21 @@ router = APIRouter()
 async def get_billing_summary(
     billing_service: BillingSvc,
     user: User = Depends(get_current_user),
-) -> BillingSummary:
-    """Get billing summary for the current user."""
+) -> dict[str, Any]:
+    """Get billing summary for the current user.
+
+    Raw ORM objects and config dicts are returned as-is; ``response_model``
+    validates them into ``BillingSummary`` in a single pass.
+    """
     wallet = await billing_service.get_wallet(user.id)
     subscription = await billing_service.get_subscription(user.id)
     ledger = await billing_service.list_ledger(user.id, limit=20)
-    packs = [BillingCreditPack(**pack) for pack in billing_service.get_credit_packs()]
-    return BillingSummary(
-        wallet=wallet,
-        subscription=subscription,
-        credit_packs=packs,
-        recent_ledger=ledger,
-    )
+    return {
+        "wallet": wallet,
+        "subscription": subscription,
+        "credit_packs": billing_service.get_credit_packs(),
+        "recent_ledger": ledger,
+    }
 
 
 @router.post("/billing/checkout", response_model=CheckoutResponse)
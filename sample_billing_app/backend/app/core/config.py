@@ -1,15 +1,32 @@
 """Application configuration using Pydantic BaseSettings."""
-# ruff: noqa: I001 - Imports structured for Jinja2 template conditionals
 
+import os
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Any, Literal
 
-from pydantic import computed_field, field_validator, ValidationInfo
+from pydantic import Field, computed_field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Billing defaults, served through default_factory so Settings does not
+# deep-copy a mutable class-level default on every instantiation.
+DEFAULT_BILLING_CREDIT_PACKS: list[dict[str, Any]] = [
+    {"credits": 2000, "price_usd": 9.9, "provider_product_id": ""},
+    {"credits": 5000, "price_usd": 19.9, "provider_product_id": ""},
+]
+DEFAULT_BILLING_MODEL_MULTIPLIERS: dict[str, float] = {"default": 1.0}
 
+
+@lru_cache(maxsize=1)
 def find_env_file() -> Path | None:
-    """Find .env file in current or parent directories."""
+    """Find .env file in current or parent directories.
+
+    An explicit ``ENV_FILE`` environment variable wins and is returned without
+    any filesystem probing. The lookup result is cached for the process.
+    """
+    env_file_override = os.environ.get("ENV_FILE")
+    if env_file_override:
+        return Path(env_file_override)
     current = Path.cwd()
     for path in [current, current.parent]:
         env_file = path / ".env"
@@ -25,6 +42,7 @@ class Settings(BaseSettings):
         env_file=find_env_file(),
         env_ignore_empty=True,
         extra="ignore",
+        frozen=True,
     )
 
     # === Project ===
@@ -46,7 +64,7 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "sample_billing_app"
 
     @computed_field  # type: ignore[prop-decorator]
-    @property
+    @cached_property
     def DATABASE_URL(self) -> str:
         """Build async PostgreSQL connection URL."""
         return (
@@ -55,7 +73,7 @@ class Settings(BaseSettings):
         )
 
     @computed_field  # type: ignore[prop-decorator]
-    @property
+    @cached_property
     def DATABASE_URL_SYNC(self) -> str:
         """Build sync PostgreSQL connection URL (for Alembic)."""
         return (
@@ -71,21 +89,6 @@ class Settings(BaseSettings):
     # === Auth (SECRET_KEY for JWT/Session/Admin) ===
     SECRET_KEY: str = "change-me-in-production-use-openssl-rand-hex-32"
 
-    @field_validator("SECRET_KEY")
-    @classmethod
-    def validate_secret_key(cls, v: str, info: ValidationInfo) -> str:
-        """Validate SECRET_KEY is secure in production."""
-        if len(v) < 32:
-            raise ValueError("SECRET_KEY must be at least 32 characters long")
-        # Get environment from values if available
-        env = info.data.get("ENVIRONMENT", "local") if info.data else "local"
-        if v == "change-me-in-production-use-openssl-rand-hex-32" and env == "production":
-            raise ValueError(
-                "SECRET_KEY must be changed in production! "
-                "Generate a secure key with: openssl rand -hex 32"
-            )
-        return v
-
     # === JWT Settings ===
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # 30 minutes
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
@@ -96,11 +99,12 @@ class Settings(BaseSettings):
     BILLING_TOKENS_PER_CREDIT: int = 1000
     BILLING_CHARS_PER_TOKEN: int = 4
     BILLING_OUTPUT_TOKENS_ESTIMATE: int = 512
-    BILLING_CREDIT_PACKS: list[dict[str, Any]] = [
-        {"credits": 2000, "price_usd": 9.9, "provider_product_id": ""},
-        {"credits": 5000, "price_usd": 19.9, "provider_product_id": ""},
-    ]
-    BILLING_MODEL_MULTIPLIERS: dict[str, float] = {"default": 1.0}
+    BILLING_CREDIT_PACKS: list[dict[str, Any]] = Field(
+        default_factory=lambda: DEFAULT_BILLING_CREDIT_PACKS
+    )
+    BILLING_MODEL_MULTIPLIERS: dict[str, float] = Field(
+        default_factory=lambda: DEFAULT_BILLING_MODEL_MULTIPLIERS
+    )
     BILLING_PROVIDER: str = "creem"
 
     # === Creem ===
@@ -116,18 +120,40 @@ class Settings(BaseSettings):
     CORS_ALLOW_CREDENTIALS: bool = True
     CORS_ALLOW_METHODS: list[str] = ["*"]
     CORS_ALLOW_HEADERS: list[str] = ["*"]
-
-    @field_validator("CORS_ORIGINS")
-    @classmethod
-    def validate_cors_origins(cls, v: list[str], info: ValidationInfo) -> list[str]:
-        """Warn if CORS_ORIGINS is too permissive in production."""
-        env = info.data.get("ENVIRONMENT", "local") if info.data else "local"
-        if "*" in v and env == "production":
+    # Seconds browsers may cache a preflight response (Chromium caps this at 7200)
+    CORS_MAX_AGE: int = 600
+
+    @model_validator(mode="after")
+    def validate_production_settings(self) -> "Settings":
+        """Validate SECRET_KEY and CORS_ORIGINS are secure in production.
+
+        Other environments skip these checks entirely.
+        """
+        if self.ENVIRONMENT != "production":
+            return self
+        if len(self.SECRET_KEY) < 32:
+            raise ValueError("SECRET_KEY must be at least 32 characters long")
+        if self.SECRET_KEY == "change-me-in-production-use-openssl-rand-hex-32":
+            raise ValueError(
+                "SECRET_KEY must be changed in production! "
+                "Generate a secure key with: openssl rand -hex 32"
+            )
+        if "*" in self.CORS_ORIGINS:
             raise ValueError(
                 "CORS_ORIGINS cannot contain '*' in production! "
                 "Specify explicit allowed origins."
             )
-        return v
+        return self
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the application settings once, on first access."""
+    return Settings()
 
 
-settings = Settings()
+def __getattr__(name: str) -> Any:
+    """Resolve ``settings`` lazily (PEP 562) so importing this module stays cheap."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,16 +2,21 @@
 
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from typing import Any
 
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 from fastapi_pagination import add_pagination
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.sessions import SessionMiddleware
 
 from app.api.exception_handlers import register_exception_handlers
 from app.api.router import api_router
 from app.core.config import settings
-from app.core.logfire_setup import instrument_app, setup_logfire
+from app.core.logfire_setup import instrument_app, instrument_asyncpg, setup_logfire
 from app.core.middleware import RequestIDMiddleware
+from app.db.session import close_db
 from app.api.routes.webhooks import creem as creem_webhooks
 
 
@@ -24,13 +29,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """
     # === Startup ===
     setup_logfire()
-    from app.core.logfire_setup import instrument_asyncpg
     instrument_asyncpg()
 
     yield
 
     # === Shutdown ===
-    from app.db.session import close_db
     await close_db()
 
 
@@ -38,6 +41,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 SHOW_DOCS_ENVIRONMENTS = ("local", "staging", "development")
 
 
+def _empty_openapi() -> dict[str, Any]:
+    """OpenAPI generator used when docs are disabled."""
+    return {}
+
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     # Only show docs in allowed environments (hide in production)
@@ -94,7 +102,7 @@ A FastAPI project
         openapi_url=openapi_url,
         docs_url=docs_url,
         redoc_url=redoc_url,
-        openapi_tags=openapi_tags,
+        openapi_tags=openapi_tags if show_docs else None,
         contact={
             "name": "Your Name",
             "email": "your@email.com",
@@ -106,28 +114,34 @@ A FastAPI project
         lifespan=lifespan,
         default_response_class=ORJSONResponse,
     )
+    if not show_docs:
+        # Never walk the routes to build a schema that is not served
+        app.openapi = _empty_openapi  # type: ignore[method-assign]
+
     # Logfire instrumentation
     instrument_app(app)
 
-    # Request ID middleware (for request correlation/debugging)
-    app.add_middleware(RequestIDMiddleware)
-
     # Exception handlers
     register_exception_handlers(app)
 
-    # CORS middleware
-    from starlette.middleware.cors import CORSMiddleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.CORS_ORIGINS,
-        allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
-        allow_methods=settings.CORS_ALLOW_METHODS,
-        allow_headers=settings.CORS_ALLOW_HEADERS,
-    )
-
-    # Session middleware (for admin authentication and/or OAuth)
-    from starlette.middleware.sessions import SessionMiddleware
-    app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
+    # Middleware, innermost first (each entry wraps the ones before it)
+    middleware = [
+        # Request ID middleware (for request correlation/debugging)
+        Middleware(RequestIDMiddleware),
+        # CORS middleware
+        Middleware(
+            CORSMiddleware,
+            allow_origins=settings.CORS_ORIGINS,
+            allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
+            allow_methods=settings.CORS_ALLOW_METHODS,
+            allow_headers=settings.CORS_ALLOW_HEADERS,
+            max_age=settings.CORS_MAX_AGE,
+        ),
+        # Session middleware (for admin authentication and/or OAuth)
+        Middleware(SessionMiddleware, secret_key=settings.SECRET_KEY),
+    ]
+    for entry in middleware:
+        app.add_middleware(entry.cls, *entry.args, **entry.kwargs)
 
     # Admin panel (environment restricted)
     ADMIN_ALLOWED_ENVIRONMENTS = ["development", "local", "staging"]
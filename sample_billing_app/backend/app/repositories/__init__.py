@@ -1,13 +1,26 @@
-"""Repository layer for database operations."""
+"""Repository layer for database operations.
+
+Repository modules are imported lazily on first attribute access (PEP 562),
+so importing one repository does not load the others.
+"""
 # ruff: noqa: I001, RUF022 - Imports structured for Jinja2 template conditionals
 
-from app.repositories.base import BaseRepository
+import importlib
+from types import ModuleType
+from typing import TYPE_CHECKING
 
-from app.repositories import user as user_repo
+from app.repositories.base import BaseRepository
 
-from app.repositories import item as item_repo
+if TYPE_CHECKING:
+    from app.repositories import user as user_repo
+    from app.repositories import item as item_repo
+    from app.repositories import billing as billing_repo
 
-from app.repositories import billing as billing_repo
+_LAZY_MODULES = {
+    "user_repo": "app.repositories.user",
+    "item_repo": "app.repositories.item",
+    "billing_repo": "app.repositories.billing",
+}
 
 __all__ = [
     "BaseRepository",
@@ -15,3 +28,12 @@ __all__ = [
     "item_repo",
     "billing_repo",
 ]
+
+
+def __getattr__(name: str) -> ModuleType:
+    """Import a repository module on first access and cache it."""
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(_LAZY_MODULES[name])
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,43 @@
-"""Pydantic schemas."""
+"""Pydantic schemas.
+
+Schema modules are imported lazily on first attribute access (PEP 562),
+so importing one schema does not build every model class.
+"""
 # ruff: noqa: I001, RUF022 - Imports structured for Jinja2 template conditionals
 
-from app.schemas.token import Token, TokenPayload
-from app.schemas.user import UserCreate, UserRead, UserUpdate
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.schemas.token import Token, TokenPayload
+    from app.schemas.user import UserCreate, UserRead, UserUpdate
+
+    from app.schemas.item import ItemCreate, ItemRead, ItemUpdate
 
-from app.schemas.item import ItemCreate, ItemRead, ItemUpdate
+    from app.schemas.billing import BillingSummary, CheckoutRequest, CheckoutResponse, TokenLedgerRead
 
-from app.schemas.billing import BillingSummary, CheckoutRequest, CheckoutResponse, TokenLedgerRead
+_LAZY_ATTRS = {
+    "Token": "app.schemas.token",
+    "TokenPayload": "app.schemas.token",
+    "UserCreate": "app.schemas.user",
+    "UserRead": "app.schemas.user",
+    "UserUpdate": "app.schemas.user",
+    "ItemCreate": "app.schemas.item",
+    "ItemRead": "app.schemas.item",
+    "ItemUpdate": "app.schemas.item",
+    "BillingSummary": "app.schemas.billing",
+    "CheckoutRequest": "app.schemas.billing",
+    "CheckoutResponse": "app.schemas.billing",
+    "TokenLedgerRead": "app.schemas.billing",
+}
 
 __all__ = ['UserCreate', 'UserRead', 'UserUpdate', 'Token', 'TokenPayload', 'ItemCreate', 'ItemRead', 'ItemUpdate', 'BillingSummary', 'CheckoutRequest', 'CheckoutResponse', 'TokenLedgerRead']
+
+
+def __getattr__(name: str) -> Any:
+    """Import the schema's module on first access and cache the attribute."""
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
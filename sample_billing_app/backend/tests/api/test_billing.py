@@ -0,0 +1,69 @@
+"""Tests for billing routes."""
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.deps import get_billing_service, get_current_user
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.fixture
+def mock_billing_service() -> MagicMock:
+    """Create a mock billing service returning ORM-like objects."""
+    service = MagicMock()
+    service.get_wallet = AsyncMock(
+        return_value=SimpleNamespace(monthly_remaining=40, prepaid_balance=2000)
+    )
+    service.get_subscription = AsyncMock(return_value=None)
+    service.list_ledger = AsyncMock(
+        return_value=[
+            SimpleNamespace(
+                id=uuid4(),
+                model_name="gpt-4o-mini",
+                prompt_tokens=100,
+                completion_tokens=50,
+                total_tokens=150,
+                cost_credits=1,
+                overage_credits=0,
+                created_at=datetime.now(UTC),
+                updated_at=None,
+            )
+        ]
+    )
+    service.get_credit_packs = MagicMock(return_value=settings.BILLING_CREDIT_PACKS)
+    return service
+
+
+@pytest.fixture
+async def billing_client(mock_billing_service: MagicMock) -> AsyncClient:
+    """Client with mocked billing service and authenticated user."""
+    app.dependency_overrides[get_billing_service] = lambda db=None: mock_billing_service
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(
+        id=uuid4(), email="user@example.com"
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as ac:
+        yield ac
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.anyio
+async def test_get_billing_summary(billing_client: AsyncClient):
+    """Test billing summary is built from service results."""
+    response = await billing_client.get(f"{settings.API_V1_STR}/billing/summary")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["wallet"] == {"monthly_remaining": 40, "prepaid_balance": 2000}
+    assert data["subscription"] is None
+    assert [pack["credits"] for pack in data["credit_packs"]] == [2000, 5000]
+    assert data["recent_ledger"][0]["total_tokens"] == 150
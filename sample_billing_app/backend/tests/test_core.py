@@ -1,6 +1,11 @@
 """Tests for core modules."""
 
-from app.core.config import settings
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError as PydanticValidationError
+
+from app.core.config import Settings, find_env_file, get_settings, settings
 from app.core.exceptions import (
     AlreadyExistsError,
     AppException,
@@ -29,6 +34,44 @@ class TestSettings:
         """Test CORS origins is a list."""
         assert isinstance(settings.CORS_ORIGINS, list)
 
+    def test_settings_are_built_once(self):
+        """Test lazy settings accessor returns the cached instance."""
+        assert get_settings() is settings
+
+    def test_database_url_is_cached(self):
+        """Test database URL is built once per settings instance."""
+        assert settings.DATABASE_URL is settings.DATABASE_URL
+        assert settings.DATABASE_URL.startswith("postgresql+asyncpg://")
+
+    def test_settings_are_immutable(self):
+        """Test settings cannot be mutated after construction."""
+        with pytest.raises(PydanticValidationError):
+            settings.DEBUG = not settings.DEBUG
+
+    def test_production_rejects_default_secret_key(self):
+        """Test production requires a non-default SECRET_KEY."""
+        with pytest.raises(PydanticValidationError, match="SECRET_KEY must be changed"):
+            Settings(ENVIRONMENT="production")
+
+    def test_production_rejects_wildcard_cors(self):
+        """Test production forbids wildcard CORS origins."""
+        with pytest.raises(PydanticValidationError, match="CORS_ORIGINS cannot contain"):
+            Settings(ENVIRONMENT="production", SECRET_KEY="x" * 64, CORS_ORIGINS=["*"])
+
+    def test_local_skips_production_checks(self):
+        """Test non-production environments skip security checks."""
+        local = Settings(ENVIRONMENT="local", SECRET_KEY="short", CORS_ORIGINS=["*"])
+        assert local.SECRET_KEY == "short"
+
+    def test_find_env_file_uses_env_override(self, monkeypatch):
+        """Test ENV_FILE override skips the directory search."""
+        monkeypatch.setenv("ENV_FILE", "/custom/path/.env")
+        find_env_file.cache_clear()
+        try:
+            assert find_env_file() == Path("/custom/path/.env")
+        finally:
+            find_env_file.cache_clear()
+
 
 class TestExceptions:
     """Tests for custom exceptions."""
@@ -1,6 +1,8 @@
 """API v1 router aggregation."""
 # ruff: noqa: I001 - Imports structured for Jinja2 template conditionals
 
+from enum import Enum
+
 from fastapi import APIRouter
 
 from app.api.routes.v1 import health
@@ -13,26 +15,25 @@ from app.api.routes.v1 import agent
 
 v1_router = APIRouter()
 
-# Health check routes (no auth required)
-v1_router.include_router(health.router, tags=["health"])
-
-# Authentication routes
-v1_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-
-# User routes
-v1_router.include_router(users.router, prefix="/users", tags=["users"])
-
-# Example CRUD routes (items)
-v1_router.include_router(items.router, prefix="/items", tags=["items"])
-
-# Conversation routes (AI chat persistence)
-v1_router.include_router(conversations.router, prefix="/conversations", tags=["conversations"])
-
-# Billing routes
-v1_router.include_router(billing.router, tags=["billing"])
-
-# WebSocket routes
-v1_router.include_router(ws.router, tags=["websocket"])
-
-# AI Agent routes
-v1_router.include_router(agent.router, tags=["agent"])
+# (router, prefix, tags) - included in order below
+V1_ROUTERS: tuple[tuple[APIRouter, str, list[str | Enum]], ...] = (
+    # Health check routes (no auth required)
+    (health.router, "", ["health"]),
+    # Authentication routes
+    (auth.router, "/auth", ["auth"]),
+    # User routes
+    (users.router, "/users", ["users"]),
+    # Example CRUD routes (items)
+    (items.router, "/items", ["items"]),
+    # Conversation routes (AI chat persistence)
+    (conversations.router, "/conversations", ["conversations"]),
+    # Billing routes
+    (billing.router, "", ["billing"]),
+    # WebSocket routes
+    (ws.router, "", ["websocket"]),
+    # AI Agent routes
+    (agent.router, "", ["agent"]),
+)
+
+for router, prefix, tags in V1_ROUTERS:
+    v1_router.include_router(router, prefix=prefix, tags=tags)
@@ -53,9 +53,9 @@ async def creem_webhook(request: Request) -> dict:
     billing_type = product.get("billing_type") or order.get("type")
     amount_raw = order.get("amount")
     currency = order.get("currency")
-    amount = None
+    amount_cents = None
     if isinstance(amount_raw, (int, float)):
-        amount = float(amount_raw) / 100
+        amount_cents = int(amount_raw)
 
     try:
         user_id = UUID(user_id_raw)
@@ -82,7 +82,7 @@ async def creem_webhook(request: Request) -> dict:
                 user_id=user_id,
                 provider="creem",
                 external_id=event.get("id", ""),
-                amount=amount,
+                amount_cents=amount_cents,
                 currency=currency,
                 metadata=metadata,
             )
@@ -95,7 +95,7 @@ async def creem_webhook(request: Request) -> dict:
                 provider="creem",
                 external_id=event.get("id", ""),
                 credits=credits,
-                amount=amount,
+                amount_cents=amount_cents,
                 currency=currency,
                 metadata=metadata,
             )
@@ -1,11 +1,15 @@
 
-"""Billing models for token usage and payments."""
+"""Billing models for token usage and payments.
+
+The `user` relationships use lazy="raise": load them explicitly with
+`selectinload(...)` when needed instead of triggering a query per row.
+"""
 
 import uuid
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime, ForeignKey, Integer, JSON, Numeric, String
+from sqlalchemy import BigInteger, Computed, DateTime, ForeignKey, Index, Integer, JSON, Numeric, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -18,15 +22,19 @@ class CreditWallet(Base, TimestampMixin):
 
     __tablename__ = "credit_wallets"
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), unique=True, index=True
     )
     monthly_remaining: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     prepaid_balance: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Running total of TokenLedger.cost_credits, so spend is read without SUM()
+    lifetime_cost_credits: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default="0", nullable=False
+    )
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return (
@@ -40,7 +48,7 @@ class Subscription(Base, TimestampMixin):
 
     __tablename__ = "subscriptions"
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), index=True
@@ -58,7 +66,7 @@ class Subscription(Base, TimestampMixin):
     )
     metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", JSON, nullable=True)
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return f"<Subscription(user_id={self.user_id}, provider={self.provider}, status={self.status})>"
@@ -68,12 +76,13 @@ class TokenLedger(Base, TimestampMixin):
     """Ledger entry for token usage and cost."""
 
     __tablename__ = "token_ledgers"
+    # Serves "latest rows for a user" as an ordered range scan (also covers user_id lookups)
+    __table_args__ = (Index("token_ledgers_user_id_created_at_idx", "user_id", "created_at"),)
+
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
-    )
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), index=True
+        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
     )
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"))
     model_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     prompt_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
     completion_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -83,7 +92,7 @@ class TokenLedger(Base, TimestampMixin):
     provider_request_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", JSON, nullable=True)
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return (
@@ -96,22 +105,27 @@ class PaymentTransaction(Base, TimestampMixin):
     """Payment transactions (subscriptions and credit packs)."""
 
     __tablename__ = "payment_transactions"
+    # Serves "latest rows for a user" as an ordered range scan (also covers user_id lookups)
+    __table_args__ = (Index("payment_transactions_user_id_created_at_idx", "user_id", "created_at"),)
+
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
-    )
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), index=True
+        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
     )
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"))
     provider: Mapped[str] = mapped_column(String(50), default="creem", index=True)
     external_id: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     kind: Mapped[str] = mapped_column(String(50), default="credit_pack")
     status: Mapped[str] = mapped_column(String(50), default="completed")
-    amount: Mapped[float | None] = mapped_column(Numeric(10, 2), nullable=True)
+    # Integer minor units (cents); `amount` is derived from it by the database
+    amount_cents: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    amount: Mapped[float | None] = mapped_column(
+        Numeric(10, 2), Computed("amount_cents / 100.0", persisted=True), nullable=True
+    )
     currency: Mapped[str | None] = mapped_column(String(10), nullable=True)
     credits_granted: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", JSON, nullable=True)
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return (
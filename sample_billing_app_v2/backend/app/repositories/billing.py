@@ -4,7 +4,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.billing import CreditWallet, PaymentTransaction, Subscription, TokenLedger
@@ -43,6 +43,36 @@ async def update_wallet(db: AsyncSession, wallet: CreditWallet) -> CreditWallet:
     return wallet
 
 
+async def deduct_credits(db: AsyncSession, *, user_id: UUID, cost: int) -> tuple[int, int]:
+    """Atomically charge cost to a wallet, monthly credits first.
+
+    The deduction and the lifetime_cost_credits increment run as one UPDATE on
+    the row locked by the FROM subquery, so concurrent charges never lose an
+    update. Returns the (monthly, prepaid) credits actually deducted.
+    """
+    old = (
+        select(CreditWallet.id, CreditWallet.monthly_remaining, CreditWallet.prepaid_balance)
+        .where(CreditWallet.user_id == user_id)
+        .with_for_update()
+        .subquery()
+    )
+    monthly = func.least(old.c.monthly_remaining, cost)
+    prepaid = func.least(old.c.prepaid_balance, cost - monthly)
+    result = await db.execute(
+        update(CreditWallet)
+        .where(CreditWallet.id == old.c.id)
+        .values(
+            monthly_remaining=old.c.monthly_remaining - monthly,
+            prepaid_balance=old.c.prepaid_balance - prepaid,
+            lifetime_cost_credits=CreditWallet.lifetime_cost_credits + cost,
+        )
+        .returning(monthly, prepaid)
+        .execution_options(synchronize_session=False)
+    )
+    monthly_deducted, prepaid_deducted = result.one()
+    return monthly_deducted, prepaid_deducted
+
+
 async def get_latest_subscription(
     db: AsyncSession,
     user_id: UUID,
@@ -169,7 +199,7 @@ async def create_transaction(
     external_id: str,
     kind: str,
     status: str,
-    amount: float | None,
+    amount_cents: int | None,
     currency: str | None,
     credits_granted: int,
     metadata: dict | None,
@@ -181,7 +211,7 @@ async def create_transaction(
         external_id=external_id,
         kind=kind,
         status=status,
-        amount=amount,
+        amount_cents=amount_cents,
         currency=currency,
         credits_granted=credits_granted,
         metadata_=metadata,
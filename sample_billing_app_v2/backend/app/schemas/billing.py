@@ -15,6 +15,7 @@ class BillingWalletRead(BaseSchema):
 
     monthly_remaining: int = Field(..., ge=0)
     prepaid_balance: int = Field(..., ge=0)
+    lifetime_cost_credits: int = Field(default=0, ge=0)
 
 
 class BillingSubscriptionRead(BaseSchema):
@@ -99,18 +99,14 @@ class BillingService:
         metadata: dict | None = None,
     ) -> TokenLedger:
         """Deduct credits and record token usage."""
-        wallet = await self.get_wallet(user_id)
+        await self.get_wallet(user_id)
         cost = calculate_cost_credits(total_tokens, model_name)
 
-        monthly_deducted = min(wallet.monthly_remaining, cost)
-        remaining = cost - monthly_deducted
-        prepaid_deducted = min(wallet.prepaid_balance, remaining)
+        monthly_deducted, prepaid_deducted = await billing_repo.deduct_credits(
+            self.db, user_id=user_id, cost=cost
+        )
         overage = cost - monthly_deducted - prepaid_deducted
 
-        wallet.monthly_remaining -= monthly_deducted
-        wallet.prepaid_balance -= prepaid_deducted
-        await billing_repo.update_wallet(self.db, wallet)
-
         return await billing_repo.create_ledger_entry(
             self.db,
             user_id=user_id,
@@ -161,7 +157,7 @@ class BillingService:
         provider: str,
         external_id: str,
         credits: int,
-        amount: float | None,
+        amount_cents: int | None,
         currency: str | None,
         metadata: dict | None,
     ) -> None:
@@ -181,7 +177,7 @@ class BillingService:
             external_id=external_id,
             kind="credit_pack",
             status="completed",
-            amount=amount,
+            amount_cents=amount_cents,
             currency=currency,
             credits_granted=credits,
             metadata=metadata,
@@ -193,7 +189,7 @@ class BillingService:
         user_id: UUID,
         provider: str,
         external_id: str,
-        amount: float | None,
+        amount_cents: int | None,
         currency: str | None,
         metadata: dict | None,
     ) -> None:
@@ -209,7 +205,7 @@ class BillingService:
             external_id=external_id,
             kind="subscription",
             status="completed",
-            amount=amount,
+            amount_cents=amount_cents,
             currency=currency,
             credits_granted=settings.BILLING_MONTHLY_CREDITS,
             metadata=metadata,
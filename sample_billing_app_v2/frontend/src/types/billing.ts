@@ -1,6 +1,7 @@
 export interface BillingWallet {
   monthly_remaining: number;
   prepaid_balance: number;
+  lifetime_cost_credits: number;
 }
 
 export interface BillingSubscription {
@@ -8,6 +8,7 @@ Uses CrewAI's event system for real-time streaming to WebSocket.
 import asyncio
 import logging
 import os
+from dataclasses import dataclass, field
 from queue import Empty, Queue
 from threading import Thread
 from typing import Any, TypedDict
@@ -31,7 +32,6 @@ from crewai.events import (
     crewai_event_bus,
 )
 from langchain_google_genai import ChatGoogleGenerativeAI
-from pydantic import BaseModel, Field
 
 from app.agents.prompts import DEFAULT_SYSTEM_PROMPT
 from app.core.config import settings
@@ -39,35 +39,38 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 
-class AgentConfig(BaseModel):
+@dataclass(slots=True, frozen=True)
+class AgentConfig:
     """Configuration for a single agent."""
 
-    role: str = Field(..., description="Agent's role/title")
-    goal: str = Field(..., description="Agent's primary goal")
-    backstory: str = Field(..., description="Agent's background context")
-    tools: list[str] = Field(default_factory=list)
+    role: str  # Agent's role/title
+    goal: str  # Agent's primary goal
+    backstory: str  # Agent's background context
+    tools: list[str] = field(default_factory=list)
     allow_delegation: bool = True
     verbose: bool = True
 
 
-class TaskConfig(BaseModel):
+@dataclass(slots=True, frozen=True)
+class TaskConfig:
     """Configuration for a single task."""
 
-    description: str = Field(..., description="Task description")
-    expected_output: str = Field(..., description="Expected output format")
-    agent_role: str = Field(..., description="Role of agent to execute this")
-    context_from: list[str] = Field(default_factory=list)
+    description: str  # Task description
+    expected_output: str  # Expected output format
+    agent_role: str  # Role of agent to execute this
+    context_from: list[str] = field(default_factory=list)
 
 
-class CrewConfig(BaseModel):
+@dataclass(slots=True, frozen=True)
+class CrewConfig:
     """Configuration for the entire crew."""
 
     name: str = "default_crew"
     process: str = "sequential"  # sequential, hierarchical
     memory: bool = True
     max_rpm: int = 10
-    agents: list[AgentConfig] = Field(default_factory=list)
-    tasks: list[TaskConfig] = Field(default_factory=list)
+    agents: list[AgentConfig] = field(default_factory=list)
+    tasks: list[TaskConfig] = field(default_factory=list)
 
 
 class CrewContext(TypedDict, total=False):
@@ -76,6 +79,8 @@ class CrewContext(TypedDict, total=False):
     user_id: str | None
     user_name: str | None
     metadata: dict[str, Any]
+    # Run tasks without context dependencies concurrently (sequential process only)
+    parallel_tasks: bool
 
 
 class CrewEventQueueListener:
@@ -333,12 +338,18 @@ class CrewAIAssistant:
 
         return agents
 
-    def _build_tasks(self, agents: dict[str, Agent]) -> list[Task]:
-        """Build Task instances from config."""
+    def _build_tasks(self, agents: dict[str, Agent], parallel_tasks: bool = False) -> list[Task]:
+        """Build Task instances from config.
+
+        With ``parallel_tasks``, tasks that take no context from other tasks are
+        marked for async execution so CrewAI runs consecutive ones concurrently.
+        The last task always stays synchronous, as CrewAI requires.
+        """
         tasks = []
         task_by_agent: dict[str, Task] = {}
+        last_index = len(self.config.tasks) - 1
 
-        for task_config in self.config.tasks:
+        for index, task_config in enumerate(self.config.tasks):
             agent = agents.get(task_config.agent_role)
             if not agent:
                 raise ValueError(f"Agent '{task_config.agent_role}' not found")
@@ -352,20 +363,22 @@ class CrewAIAssistant:
                 expected_output=task_config.expected_output,
                 agent=agent,
                 context=context if context else None,
+                async_execution=parallel_tasks and not context and index < last_index,
             )
             tasks.append(task)
             task_by_agent[task_config.agent_role] = task
 
         return tasks
 
-    def _build_crew(self) -> Crew:
+    def _build_crew(self, parallel_tasks: bool = False) -> Crew:
         """Build and return the Crew instance."""
-        self._agents = self._build_agents()
-        tasks = self._build_tasks(self._agents)
-
         process = (
             Process.hierarchical if self.config.process == "hierarchical" else Process.sequential
         )
+        self._agents = self._build_agents()
+        tasks = self._build_tasks(
+            self._agents, parallel_tasks=parallel_tasks and process == Process.sequential
+        )
 
         return Crew(
             agents=list(self._agents.values()),
@@ -410,8 +423,8 @@ class CrewAIAssistant:
 
         logger.info(f"Starting CrewAI execution: {user_input[:100]}...")
 
-        # Reset crew for fresh execution
-        self._crew = None
+        # Fresh crew for each execution
+        self._crew = self._build_crew(parallel_tasks=crew_context.get("parallel_tasks", False))
 
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, lambda: self.crew.kickoff(inputs=inputs))
@@ -470,6 +483,7 @@ class CrewAIAssistant:
 
         # Reset crew for fresh execution
         self._crew = None
+        parallel_tasks = bool(context and context.get("parallel_tasks"))
 
         # Create event listener BEFORE starting thread (keeps reference alive)
         listener = CrewEventQueueListener(event_queue)
@@ -479,7 +493,7 @@ class CrewAIAssistant:
             nonlocal listener  # Keep reference to prevent GC
             try:
                 # Build and run crew
-                crew = self.crew
+                crew = self._crew = self._build_crew(parallel_tasks=parallel_tasks)
                 result = crew.kickoff(inputs=inputs)
 
                 # Ensure final result is sent (event bus may have already sent it)
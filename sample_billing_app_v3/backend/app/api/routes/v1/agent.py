@@ -1,9 +1,13 @@
 """AI Agent WebSocket routes with streaming support (CrewAI Multi-Agent)."""
 
+import asyncio
 import logging
+from collections import deque
+from dataclasses import dataclass, field
 from typing import Any
 from uuid import UUID
 
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from app.agents.crewai_assistant import CrewContext, get_crew
@@ -16,37 +20,162 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+# Outbound events buffered per connection before the producer has to wait
+OUTBOUND_QUEUE_SIZE = 512
+# Queue depths at which backpressure is signalled to the client and cleared
+BACKPRESSURE_HIGH_WATER = 400
+BACKPRESSURE_LOW_WATER = 50
+BACKPRESSURE_EXIT_FRAME = orjson.dumps({"type": "backpressure", "data": {"state": "exit"}}).decode()
+# Lifecycle events where only the most recent one matters to the client
+COALESCED_EVENT_TYPES = frozenset({"llm_started", "agent_action"})
+# Seconds a closing connection's writer gets to flush queued events
+DISCONNECT_DRAIN_TIMEOUT = 2.0
+
+
+class _Outbox:
+    """Bounded queue of outbound events for a single WebSocket connection.
+
+    When the queue is full, a coalescible event replaces the newest queued
+    event of the same type instead of waiting for the writer to drain.
+    """
+
+    def __init__(self, maxsize: int = OUTBOUND_QUEUE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.events: deque[dict[str, Any]] = deque()
+        self.latest_of_type: dict[str, dict[str, Any]] = {}
+        self.backpressure = False
+        self.closed = False
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def _append(self, message: dict[str, Any]) -> None:
+        self.events.append(message)
+        self.latest_of_type[message["type"]] = message
+        self._not_empty.set()
+
+    async def put(self, event_type: str, data: Any) -> bool:
+        """Queue an event, coalescing or waiting for room when full.
+
+        Returns False if the connection has been closed.
+        """
+        while not self.closed and len(self.events) >= self.maxsize:
+            queued = self.latest_of_type.get(event_type)
+            if queued is not None and event_type in COALESCED_EVENT_TYPES:
+                queued["data"] = data
+                return True
+            self._not_full.clear()
+            await self._not_full.wait()
+        if self.closed:
+            return False
+
+        self._append({"type": event_type, "data": data})
+        if not self.backpressure and len(self.events) >= BACKPRESSURE_HIGH_WATER:
+            self.backpressure = True
+            self._append({"type": "backpressure", "data": {"state": "enter"}})
+        return True
+
+    async def get(self) -> dict[str, Any] | None:
+        """Wait for and remove the oldest queued event.
+
+        Returns None once the outbox is closed and fully drained.
+        """
+        while not self.events:
+            if self.closed:
+                return None
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        message = self.events.popleft()
+        if self.latest_of_type.get(message["type"]) is message:
+            del self.latest_of_type[message["type"]]
+        self._not_full.set()
+        return message
+
+    def close(self) -> None:
+        """Stop accepting events and release any waiting producer or writer."""
+        self.closed = True
+        self._not_full.set()
+        self._not_empty.set()
+
+
+@dataclass(slots=True)
+class ConnState:
+    """Per-connection state tracked by the connection manager."""
+
+    outbox: _Outbox = field(default_factory=_Outbox)
+    writer: asyncio.Task[None] | None = None
+
+
 class AgentConnectionManager:
-    """WebSocket connection manager for AI agent."""
+    """WebSocket connection manager for AI agent.
+
+    Events are not written to the socket inline: each connection gets a
+    bounded outbox drained by its own writer task, so a slow client cannot
+    stall the crew stream.
+    """
 
     def __init__(self) -> None:
-        self.active_connections: list[WebSocket] = []
+        self.active_connections: dict[WebSocket, ConnState] = {}
 
     async def connect(self, websocket: WebSocket) -> None:
         """Accept and store a new WebSocket connection."""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        state = ConnState()
+        state.writer = asyncio.create_task(self._writer(websocket, state.outbox))
+        self.active_connections[websocket] = state
         logger.info(f"Agent WebSocket connected. Total connections: {len(self.active_connections)}")
 
-    def disconnect(self, websocket: WebSocket) -> None:
-        """Remove a WebSocket connection."""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+    async def disconnect(self, websocket: WebSocket) -> None:
+        """Remove a WebSocket connection.
+
+        Events already queued (e.g. the final answer or an error) are flushed
+        first; the writer is cancelled if it cannot drain within
+        DISCONNECT_DRAIN_TIMEOUT.
+        """
+        state = self.active_connections.pop(websocket, None)
+        if state is not None:
+            state.outbox.close()
+            if state.writer is not None:
+                try:
+                    await asyncio.wait_for(state.writer, DISCONNECT_DRAIN_TIMEOUT)
+                except TimeoutError:
+                    logger.warning(f"Dropped {len(state.outbox)} undelivered agent events")
         logger.info(
             f"Agent WebSocket disconnected. Total connections: {len(self.active_connections)}"
         )
 
-    async def send_event(self, websocket: WebSocket, event_type: str, data: Any) -> bool:
-        """Send a JSON event to a specific WebSocket client.
-
-        Returns True if sent successfully, False if connection is closed.
-        """
+    async def _writer(self, websocket: WebSocket, outbox: _Outbox) -> None:
+        """Drain the connection's outbox onto the socket."""
         try:
-            await websocket.send_json({"type": event_type, "data": data})
-            return True
+            while (message := await outbox.get()) is not None:
+                # Text frames: the frontend parses event.data as a JSON string
+                await websocket.send_text(orjson.dumps(message).decode())
+                if outbox.backpressure and len(outbox) <= BACKPRESSURE_LOW_WATER:
+                    outbox.backpressure = False
+                    await websocket.send_text(BACKPRESSURE_EXIT_FRAME)
         except (WebSocketDisconnect, RuntimeError):
             # Connection already closed
+            pass
+        finally:
+            outbox.close()
+
+    async def send_event(self, websocket: WebSocket, event_type: str, data: Any) -> bool:
+        """Queue a JSON event for a specific WebSocket client.
+
+        Returns True if queued, False if connection is closed.
+        """
+        state = self.active_connections.get(websocket)
+        if state is None or state.outbox.closed:
             return False
+        return await state.outbox.put(event_type, data)
+
+    def is_closed(self, websocket: WebSocket) -> bool:
+        """Return True once the connection is gone or its writer has failed."""
+        state = self.active_connections.get(websocket)
+        return state is None or state.outbox.closed
 
 
 manager = AgentConnectionManager()
@@ -84,8 +213,19 @@ async def agent_websocket(
 
     # Conversation state per connection
     conversation_history: list[dict[str, str]] = []
-    context: CrewContext = {}
+    # Independent crew tasks run concurrently; their events carry task_id
+    context: CrewContext = {"parallel_tasks": True}
     current_conversation_id: str | None = None
+    # Parsed once and reused for every write in the conversation
+    current_conversation_uuid: UUID | None = None
+
+    # One crew per connection: turns on a connection run sequentially, while the
+    # assistant keeps per-run state and so is not shared across connections.
+    crew_assistant = get_crew()
+    crew_start_data = {
+        "crew_name": crew_assistant.config.name,
+        "process": crew_assistant.config.process,
+    }
 
     try:
         while True:
@@ -102,54 +242,21 @@ async def agent_websocket(
             prompt_tokens_estimate = None
             billing_model_name = None
 
-            # Handle conversation persistence
-            try:
-                async with get_db_context() as db:
-                    conv_service = get_conversation_service(db)
-
-                    # Get or create conversation
-                    requested_conv_id = data.get("conversation_id")
-                    if requested_conv_id:
-                        current_conversation_id = requested_conv_id
-                        # Verify conversation exists
-                        await conv_service.get_conversation(UUID(requested_conv_id))
-                    elif not current_conversation_id:
-                        # Create new conversation
-                        conv_data = ConversationCreate(
-                            title=user_message[:50] if len(user_message) > 50 else user_message,
-                        )
-                        conversation = await conv_service.create_conversation(conv_data)
-                        current_conversation_id = str(conversation.id)
-                        await manager.send_event(
-                            websocket,
-                            "conversation_created",
-                            {"conversation_id": current_conversation_id},
-                        )
-
-                    # Save user message
-                    await conv_service.add_message(
-                        UUID(current_conversation_id),
-                        MessageCreate(role="user", content=user_message),
-                    )
-            except Exception as e:
-                logger.warning(f"Failed to persist conversation: {e}")
-                # Continue without persistence
+            # User and agent messages for this turn are persisted together in a
+            # single session once the crew finishes, so no pool connection is
+            # held while the crew is streaming.
+            pending_messages: list[MessageCreate] = [
+                MessageCreate(role="user", content=user_message)
+            ]
+            completed = False
+            disconnected = False
 
             await manager.send_event(websocket, "user_prompt", {"content": user_message})
 
             try:
-                crew_assistant = get_crew()
-
                 final_output = ""
 
-                await manager.send_event(
-                    websocket,
-                    "crew_start",
-                    {
-                        "crew_name": crew_assistant.config.name,
-                        "process": crew_assistant.config.process,
-                    },
-                )
+                await manager.send_event(websocket, "crew_start", crew_start_data)
 
                 # Stream crew execution events
                 async for event in crew_assistant.stream(
@@ -157,6 +264,9 @@ async def agent_websocket(
                     history=conversation_history,
                     context=context,
                 ):
+                    if manager.is_closed(websocket):
+                        # Writer hit a closed socket: stop relaying crew events
+                        raise WebSocketDisconnect(code=1006)
                     event_type = event.get("type", "unknown")
 
                     # Crew lifecycle events
@@ -192,20 +302,14 @@ async def agent_websocket(
                                 "output": agent_output,
                             },
                         )
-                        # Save agent's output as a separate message
-                        if current_conversation_id and agent_output:
-                            try:
-                                async with get_db_context() as db:
-                                    conv_service = get_conversation_service(db)
-                                    await conv_service.add_message(
-                                        UUID(current_conversation_id),
-                                        MessageCreate(
-                                            role="assistant",
-                                            content=f"✅ **{agent_name}**\n\n{agent_output}",
-                                        ),
-                                    )
-                            except Exception as e:
-                                logger.warning(f"Failed to persist agent response: {e}")
+                        # Agent's output is saved as a separate message after the run
+                        if agent_output:
+                            pending_messages.append(
+                                MessageCreate(
+                                    role="assistant",
+                                    content=f"✅ **{agent_name}**\n\n{agent_output}",
+                                )
+                            )
 
                     # Task events
                     elif event_type == "task_started":
@@ -294,26 +398,62 @@ async def agent_websocket(
                 conversation_history.append({"role": "user", "content": user_message})
                 if final_output:
                     conversation_history.append({"role": "assistant", "content": final_output})
-                # Note: Agent outputs are saved individually in agent_completed events above
 
-                await manager.send_event(
-                    websocket,
-                    "complete",
-                    {
-                        "conversation_id": current_conversation_id,
-                    },
-                )
+                completed = True
 
             except WebSocketDisconnect:
                 # Client disconnected during processing - this is normal
                 logger.info("Client disconnected during agent processing")
-                break
+                disconnected = True
             except Exception as e:
                 logger.exception(f"Error processing agent request: {e}")
                 # Try to send error, but don't fail if connection is closed
                 await manager.send_event(websocket, "error", {"message": str(e)})
 
+            # Handle conversation persistence
+            try:
+                async with get_db_context() as db:
+                    conv_service = get_conversation_service(db)
+
+                    # Get or create conversation
+                    requested_conv_id = data.get("conversation_id")
+                    if requested_conv_id:
+                        current_conversation_uuid = UUID(requested_conv_id)
+                        current_conversation_id = requested_conv_id
+                        # Verify conversation exists
+                        await conv_service.get_conversation(current_conversation_uuid)
+                    elif not current_conversation_uuid:
+                        # Create new conversation
+                        conv_data = ConversationCreate(
+                            title=user_message[:50],
+                        )
+                        conversation = await conv_service.create_conversation(conv_data)
+                        current_conversation_uuid = conversation.id
+                        current_conversation_id = str(conversation.id)
+                        await manager.send_event(
+                            websocket,
+                            "conversation_created",
+                            {"conversation_id": current_conversation_id},
+                        )
+
+                    # Save user message and agent outputs
+                    await conv_service.add_messages(current_conversation_uuid, pending_messages)
+            except Exception as e:
+                logger.warning(f"Failed to persist conversation: {e}")
+                # Continue without persistence
+
+            if disconnected:
+                break
+            if completed:
+                await manager.send_event(
+                    websocket,
+                    "complete",
+                    {
+                        "conversation_id": current_conversation_id,
+                    },
+                )
+
     except WebSocketDisconnect:
         pass  # Normal disconnect
     finally:
-        manager.disconnect(websocket)
+        await manager.disconnect(websocket)
@@ -1,6 +1,8 @@
 """Application configuration using Pydantic BaseSettings."""
 # ruff: noqa: I001 - Imports structured for Jinja2 template conditionals
 
+import os
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Any, Literal
 
@@ -8,8 +10,16 @@ from pydantic import computed_field, field_validator, ValidationInfo
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+@lru_cache(maxsize=1)
 def find_env_file() -> Path | None:
-    """Find .env file in current or parent directories."""
+    """Find .env file in current or parent directories.
+
+    An explicit ``ENV_FILE`` environment variable wins and is returned without
+    any filesystem probing. The lookup result is cached for the process.
+    """
+    env_file_override = os.environ.get("ENV_FILE")
+    if env_file_override:
+        return Path(env_file_override)
     current = Path.cwd()
     for path in [current, current.parent]:
         env_file = path / ".env"
@@ -46,7 +56,7 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "sample_billing_app_v3"
 
     @computed_field  # type: ignore[prop-decorator]
-    @property
+    @cached_property
     def DATABASE_URL(self) -> str:
         """Build async PostgreSQL connection URL."""
         return (
@@ -55,7 +65,7 @@ class Settings(BaseSettings):
         )
 
     @computed_field  # type: ignore[prop-decorator]
-    @property
+    @cached_property
     def DATABASE_URL_SYNC(self) -> str:
         """Build sync PostgreSQL connection URL (for Alembic)."""
         return (
@@ -64,9 +74,13 @@ class Settings(BaseSettings):
         )
 
     # Pool configuration
-    DB_POOL_SIZE: int = 5
-    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
     DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 300  # seconds; -1 disables recycling
+    DB_POOL_PRE_PING: bool = True
+    # Disable app-side pooling when connecting through an external pooler (e.g. PgBouncer)
+    DB_USE_NULL_POOL: bool = False
 
     # === Auth (SECRET_KEY for JWT/Session/Admin) ===
     SECRET_KEY: str = "change-me-in-production-use-openssl-rand-hex-32"
@@ -102,6 +116,8 @@ class Settings(BaseSettings):
     ]
     BILLING_MODEL_MULTIPLIERS: dict[str, float] = {"default": 1.0}
     BILLING_PROVIDER: str = "creem"
+    # Queue ledger rows for the batched background writer instead of inserting inline
+    BILLING_LEDGER_BATCHING: bool = True
 
     # === Creem ===
     CREEM_API_KEY: str | None = None
@@ -139,7 +155,7 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
 
     @computed_field  # type: ignore[prop-decorator]
-    @property
+    @cached_property
     def REDIS_URL(self) -> str:
         """Build Redis connection URL."""
         if self.REDIS_PASSWORD:
@@ -38,7 +38,7 @@ class Subscription(Base, TimestampMixin):
     __tablename__ = "subscriptions"
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), index=True
+        UUID(as_uuid=True), ForeignKey("users.id"), unique=True, index=True
     )
     provider: Mapped[str] = mapped_column(String(50), default="creem", index=True)
     provider_subscription_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
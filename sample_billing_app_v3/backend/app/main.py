@@ -46,10 +46,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[LifespanState, None]:
     from app.core.cache import setup_cache
 
     setup_cache(redis_client)
+    from app.repositories.ledger_writer import get_ledger_writer
+
+    ledger_writer = get_ledger_writer()
+    if settings.BILLING_LEDGER_BATCHING:
+        ledger_writer.start()
 
     yield {"redis": redis_client}
 
     # === Shutdown ===
+    await ledger_writer.stop()
     await redis_client.close()
     from app.db.session import close_db
 
@@ -1,12 +1,22 @@
-"""Billing repository (PostgreSQL async)."""
+"""Billing repository (PostgreSQL async).
+
+Ledger listings load rows with ``raiseload("*")``: relationships a caller
+needs must be eager-loaded explicitly, so a new relationship on the model
+cannot silently introduce N+1 lazy loads.
+"""
 
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, insert, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, raiseload
 
+from app.core.config import settings
 from app.db.models.billing import CreditWallet, PaymentTransaction, Subscription, TokenLedger
+from app.db.models.user import User
+from app.repositories.ledger_writer import get_ledger_writer
 
 
 async def get_wallet_by_user_id(db: AsyncSession, user_id: UUID) -> CreditWallet | None:
@@ -15,6 +25,21 @@ async def get_wallet_by_user_id(db: AsyncSession, user_id: UUID) -> CreditWallet
     return result.scalar_one_or_none()
 
 
+async def get_wallet_for_update(db: AsyncSession, user_id: UUID) -> CreditWallet | None:
+    """Get wallet by user ID, locking the row until the transaction ends.
+
+    Use on read-modify-write paths so concurrent balance changes serialize
+    instead of overwriting each other.
+    """
+    result = await db.execute(
+        select(CreditWallet)
+        .where(CreditWallet.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 async def create_wallet(
     db: AsyncSession,
     *,
@@ -23,15 +48,16 @@ async def create_wallet(
     prepaid_balance: int = 0,
 ) -> CreditWallet:
     """Create a wallet for a user."""
-    wallet = CreditWallet(
-        user_id=user_id,
-        monthly_remaining=monthly_remaining,
-        prepaid_balance=prepaid_balance,
+    result = await db.scalars(
+        insert(CreditWallet)
+        .values(
+            user_id=user_id,
+            monthly_remaining=monthly_remaining,
+            prepaid_balance=prepaid_balance,
+        )
+        .returning(CreditWallet)
     )
-    db.add(wallet)
-    await db.flush()
-    await db.refresh(wallet)
-    return wallet
+    return result.one()
 
 
 async def update_wallet(db: AsyncSession, wallet: CreditWallet) -> CreditWallet:
@@ -56,6 +82,19 @@ async def get_latest_subscription(
     return result.scalar_one_or_none()
 
 
+# Columns overwritten when a user's subscription row already exists
+_SUBSCRIPTION_UPSERT_COLUMNS = (
+    "provider",
+    "provider_subscription_id",
+    "status",
+    "plan_name",
+    "monthly_credits",
+    "current_period_start",
+    "current_period_end",
+    "metadata",
+)
+
+
 async def upsert_subscription(
     db: AsyncSession,
     *,
@@ -69,23 +108,8 @@ async def upsert_subscription(
     current_period_end: datetime | None,
     metadata: dict | None,
 ) -> Subscription:
-    """Create or update the latest subscription for a user."""
-    subscription = await get_latest_subscription(db, user_id)
-    if subscription:
-        subscription.provider = provider
-        subscription.provider_subscription_id = provider_subscription_id
-        subscription.status = status
-        subscription.plan_name = plan_name
-        subscription.monthly_credits = monthly_credits
-        subscription.current_period_start = current_period_start
-        subscription.current_period_end = current_period_end
-        subscription.metadata_ = metadata
-        db.add(subscription)
-        await db.flush()
-        await db.refresh(subscription)
-        return subscription
-
-    subscription = Subscription(
+    """Create or update the subscription for a user in a single statement."""
+    stmt = pg_insert(Subscription).values(
         user_id=user_id,
         provider=provider,
         provider_subscription_id=provider_subscription_id,
@@ -96,10 +120,15 @@ async def upsert_subscription(
         current_period_end=current_period_end,
         metadata_=metadata,
     )
-    db.add(subscription)
-    await db.flush()
-    await db.refresh(subscription)
-    return subscription
+    upsert = stmt.on_conflict_do_update(
+        index_elements=[Subscription.user_id],
+        set_={
+            **{column: stmt.excluded[column] for column in _SUBSCRIPTION_UPSERT_COLUMNS},
+            "updated_at": func.now(),
+        },
+    ).returning(Subscription)
+    result = await db.scalars(upsert, execution_options={"populate_existing": True})
+    return result.one()
 
 
 async def create_ledger_entry(
@@ -114,23 +143,31 @@ async def create_ledger_entry(
     overage_credits: int,
     provider_request_id: str | None,
     metadata: dict | None,
-) -> TokenLedger:
-    """Create a token usage ledger entry."""
-    entry = TokenLedger(
-        user_id=user_id,
-        model_name=model_name,
-        prompt_tokens=prompt_tokens,
-        completion_tokens=completion_tokens,
-        total_tokens=total_tokens,
-        cost_credits=cost_credits,
-        overage_credits=overage_credits,
-        provider_request_id=provider_request_id,
-        metadata_=metadata,
-    )
-    db.add(entry)
-    await db.flush()
-    await db.refresh(entry)
-    return entry
+    returning: bool = False,
+) -> TokenLedger | None:
+    """Record a token usage ledger entry.
+
+    With BILLING_LEDGER_BATCHING on, the row is handed to the batched
+    background writer and None is returned: it is written outside the caller's
+    transaction. Pass returning=True, or turn the setting off, to insert it in
+    the caller's transaction and get the row back.
+    """
+    values = {
+        "user_id": user_id,
+        "model_name": model_name,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+        "cost_credits": cost_credits,
+        "overage_credits": overage_credits,
+        "provider_request_id": provider_request_id,
+        "metadata_": metadata,
+    }
+    if settings.BILLING_LEDGER_BATCHING and not returning:
+        await get_ledger_writer().put(values)
+        return None
+    result = await db.scalars(insert(TokenLedger).values(**values).returning(TokenLedger))
+    return result.one()
 
 
 async def list_ledger_entries(
@@ -140,15 +177,61 @@ async def list_ledger_entries(
     limit: int = 20,
 ) -> list[TokenLedger]:
     """List recent ledger entries for a user."""
-    result = await db.execute(
+    query = (
         select(TokenLedger)
         .where(TokenLedger.user_id == user_id)
         .order_by(desc(TokenLedger.created_at))
         .limit(limit)
+        .options(raiseload("*"))
     )
+    result = await db.execute(query)
     return list(result.scalars().all())
 
 
+async def get_billing_summary(
+    db: AsyncSession,
+    *,
+    user_id: UUID,
+    ledger_limit: int = 20,
+) -> tuple[CreditWallet | None, Subscription | None, list[TokenLedger]]:
+    """Get wallet, latest subscription and recent ledger entries in one query.
+
+    The user row anchors the statement so it always returns at least one row;
+    the latest subscription and recent ledger entries are joined laterally.
+    """
+    latest_subscription = aliased(
+        Subscription,
+        select(Subscription)
+        .where(Subscription.user_id == User.id)
+        .order_by(desc(Subscription.created_at))
+        .limit(1)
+        .lateral(),
+    )
+    recent_ledger = aliased(
+        TokenLedger,
+        select(TokenLedger)
+        .where(TokenLedger.user_id == User.id)
+        .order_by(desc(TokenLedger.created_at))
+        .limit(ledger_limit)
+        .lateral(),
+    )
+    result = await db.execute(
+        select(CreditWallet, latest_subscription, recent_ledger)
+        .select_from(User)
+        .outerjoin(CreditWallet, CreditWallet.user_id == User.id)
+        .outerjoin(latest_subscription, true())
+        .outerjoin(recent_ledger, true())
+        .where(User.id == user_id)
+        .order_by(desc(recent_ledger.created_at))
+    )
+    rows = result.all()
+    if not rows:
+        return None, None, []
+    wallet, subscription, _ = rows[0]
+    ledger = [entry for _, _, entry in rows if entry is not None]
+    return wallet, subscription, ledger
+
+
 async def get_transaction_by_external_id(
     db: AsyncSession,
     external_id: str,
@@ -174,18 +257,19 @@ async def create_transaction(
     metadata: dict | None,
 ) -> PaymentTransaction:
     """Create a payment transaction entry."""
-    transaction = PaymentTransaction(
-        user_id=user_id,
-        provider=provider,
-        external_id=external_id,
-        kind=kind,
-        status=status,
-        amount=amount,
-        currency=currency,
-        credits_granted=credits_granted,
-        metadata_=metadata,
+    result = await db.scalars(
+        insert(PaymentTransaction)
+        .values(
+            user_id=user_id,
+            provider=provider,
+            external_id=external_id,
+            kind=kind,
+            status=status,
+            amount=amount,
+            currency=currency,
+            credits_granted=credits_granted,
+            metadata_=metadata,
+        )
+        .returning(PaymentTransaction)
     )
-    db.add(transaction)
-    await db.flush()
-    await db.refresh(transaction)
-    return transaction
+    return result.one()
@@ -3,7 +3,8 @@
 Contains database operations for Conversation, Message, and ToolCall entities.
 """
 
-from datetime import datetime
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
 from sqlalchemy import func, select
@@ -12,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.db.models.conversation import Conversation, Message, ToolCall
+from app.schemas.conversation import MessageCreate
 
 # =============================================================================
 # Conversation Operations
@@ -193,6 +195,42 @@ async def create_message(
     return message
 
 
+async def create_messages(
+    db: AsyncSession,
+    *,
+    conversation_id: UUID,
+    messages: Sequence[MessageCreate],
+) -> list[Message]:
+    """Create several messages with a single flush."""
+    # now() is constant within a transaction, so stamp rows explicitly to
+    # keep created_at ordering identical to insertion order.
+    created_at = datetime.now(UTC)
+    db_messages = [
+        Message(
+            conversation_id=conversation_id,
+            role=data.role,
+            content=data.content,
+            model_name=data.model_name,
+            tokens_used=data.tokens_used,
+            created_at=created_at + timedelta(microseconds=index),
+        )
+        for index, data in enumerate(messages)
+    ]
+    if not db_messages:
+        return []
+    db.add_all(db_messages)
+    await db.flush()
+
+    # Update conversation's updated_at timestamp
+    await db.execute(
+        sql_update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(updated_at=db_messages[-1].created_at)
+    )
+
+    return db_messages
+
+
 async def delete_message(db: AsyncSession, message_id: UUID) -> bool:
     """Delete a message."""
     message = await get_message_by_id(db, message_id)
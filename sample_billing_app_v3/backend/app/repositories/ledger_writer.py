@@ -0,0 +1,136 @@
+"""Batched token ledger writer (PostgreSQL async).
+
+Buffers ledger rows in memory and inserts them in multi-row batches from a
+background task. Rows are written outside the caller's transaction, so use
+it only for usage records where the caller does not need the row back.
+"""
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import insert
+
+from app.db.models.billing import TokenLedger
+
+logger = logging.getLogger(__name__)
+
+# Flush when this many rows are buffered or the interval elapses, whichever is first
+LEDGER_BATCH_SIZE = 50
+LEDGER_FLUSH_INTERVAL = 0.1
+# Rows buffered before put() waits for the flusher to catch up
+LEDGER_QUEUE_SIZE = 10_000
+# Attempts per batch, with a linearly growing delay (seconds) between them
+LEDGER_WRITE_ATTEMPTS = 3
+LEDGER_RETRY_DELAY = 0.5
+
+
+class LedgerWriteQueue:
+    """Bounded in-memory queue of ledger rows drained by a background flusher.
+
+    The queue and flusher task are created by start() on the running event
+    loop and discarded by stop(), so the writer can be restarted by a later
+    application lifespan.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = LEDGER_BATCH_SIZE,
+        flush_interval: float = LEDGER_FLUSH_INTERVAL,
+        maxsize: int = LEDGER_QUEUE_SIZE,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.maxsize = maxsize
+        # None is the shutdown sentinel
+        self._queue: asyncio.Queue[dict[str, Any] | None] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is accepting rows."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._flusher(self._queue))
+
+    async def stop(self) -> None:
+        """Flush buffered rows and stop the background flusher."""
+        if self._queue is None or self._task is None:
+            return
+        queue, task = self._queue, self._task
+        self._queue, self._task = None, None
+        if not task.done():
+            await queue.put(None)
+        await task
+
+    async def put(self, entry: dict[str, Any]) -> None:
+        """Buffer a ledger row (keyed by TokenLedger attribute names).
+
+        Waits while the queue is full, so producers slow down to the rate the
+        database can absorb instead of growing memory without bound.
+        """
+        if self._queue is None or not self.running:
+            raise RuntimeError("Ledger writer is not running")
+        await self._queue.put(entry)
+
+    async def _next_batch(
+        self, queue: asyncio.Queue[dict[str, Any] | None]
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Collect up to batch_size rows; returns the batch and whether to stop."""
+        first = await queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                entry = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def _write_batch(self, batch: list[dict[str, Any]]) -> None:
+        """Insert a batch, retrying transient failures before giving up on it."""
+        from app.db.session import get_db_context
+
+        for attempt in range(1, LEDGER_WRITE_ATTEMPTS + 1):
+            try:
+                async with get_db_context() as db:
+                    await db.execute(insert(TokenLedger), batch)
+                return
+            except Exception:
+                if attempt == LEDGER_WRITE_ATTEMPTS:
+                    # Log the rows themselves so they can be replayed by hand
+                    logger.exception(f"Failed to write {len(batch)} ledger entries: {batch!r}")
+                    return
+                logger.warning(
+                    f"Ledger batch write failed (attempt {attempt}/{LEDGER_WRITE_ATTEMPTS})",
+                    exc_info=True,
+                )
+                await asyncio.sleep(LEDGER_RETRY_DELAY * attempt)
+
+    async def _flusher(self, queue: asyncio.Queue[dict[str, Any] | None]) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch(queue)
+            if batch:
+                await self._write_batch(batch)
+
+
+@lru_cache(maxsize=1)
+def get_ledger_writer() -> LedgerWriteQueue:
+    """Return the process-wide ledger writer, creating it on first use."""
+    return LedgerWriteQueue()
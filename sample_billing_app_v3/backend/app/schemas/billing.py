@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Literal
 from uuid import UUID
 
-from pydantic import Field
+from pydantic import ConfigDict, Field
 
 from app.schemas.base import BaseSchema, TimestampSchema
 
@@ -28,7 +28,12 @@ class BillingSubscriptionRead(BaseSchema):
 
 
 class BillingCreditPack(BaseSchema):
-    """Available credit pack."""
+    """Available credit pack.
+
+    Frozen because parsed packs are built once and shared across requests.
+    """
+
+    model_config = ConfigDict(frozen=True)
 
     credits: int
     price_usd: float
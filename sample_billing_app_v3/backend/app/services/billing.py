@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import math
 from datetime import datetime
+from functools import lru_cache
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,6 +14,7 @@ from app.core.config import settings
 from app.core.exceptions import BadRequestError, PaymentRequiredError
 from app.db.models.billing import CreditWallet, Subscription, TokenLedger
 from app.repositories import billing_repo
+from app.schemas.billing import BillingCreditPack
 
 
 def estimate_tokens_from_text(text: str) -> int:
@@ -40,6 +42,12 @@ def get_model_multiplier(model_name: str | None) -> float:
     return float(multipliers.get("default", 1.0))
 
 
+@lru_cache(maxsize=1)
+def get_credit_pack_models() -> tuple[BillingCreditPack, ...]:
+    """Parse the configured credit packs once."""
+    return tuple(BillingCreditPack(**pack) for pack in settings.BILLING_CREDIT_PACKS)
+
+
 def calculate_cost_credits(total_tokens: int, model_name: str | None) -> int:
     """Convert token usage to billable credits."""
     if total_tokens <= 0:
@@ -55,9 +63,16 @@ class BillingService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_wallet(self, user_id: UUID) -> CreditWallet:
-        """Fetch or create a wallet for the user."""
-        wallet = await billing_repo.get_wallet_by_user_id(self.db, user_id)
+    async def get_wallet(self, user_id: UUID, *, for_update: bool = False) -> CreditWallet:
+        """Fetch or create a wallet for the user.
+
+        Pass ``for_update=True`` before changing balances to lock the row for
+        the rest of the transaction; plain reads take no lock.
+        """
+        if for_update:
+            wallet = await billing_repo.get_wallet_for_update(self.db, user_id)
+        else:
+            wallet = await billing_repo.get_wallet_by_user_id(self.db, user_id)
         if not wallet:
             wallet = await billing_repo.create_wallet(self.db, user_id=user_id)
         return wallet
@@ -70,10 +85,25 @@ class BillingService:
         """List recent token ledger entries."""
         return await billing_repo.list_ledger_entries(self.db, user_id=user_id, limit=limit)
 
+    async def get_summary(
+        self, user_id: UUID, ledger_limit: int = 20
+    ) -> tuple[CreditWallet, Subscription | None, list[TokenLedger]]:
+        """Fetch wallet, latest subscription and recent ledger entries together."""
+        wallet, subscription, ledger = await billing_repo.get_billing_summary(
+            self.db, user_id=user_id, ledger_limit=ledger_limit
+        )
+        if not wallet:
+            wallet = await billing_repo.create_wallet(self.db, user_id=user_id)
+        return wallet, subscription, ledger
+
     def get_credit_packs(self) -> list[dict]:
         """Return configured credit packs."""
         return settings.BILLING_CREDIT_PACKS
 
+    def get_credit_pack_models(self) -> list[BillingCreditPack]:
+        """Return configured credit packs as response schemas."""
+        return list(get_credit_pack_models())
+
     async def precheck(self, user_id: UUID, model_name: str | None, estimated_tokens: int) -> int:
         """Ensure user has enough credits for estimated usage."""
         wallet = await self.get_wallet(user_id)
@@ -96,9 +126,13 @@ class BillingService:
         total_tokens: int,
         provider_request_id: str | None = None,
         metadata: dict | None = None,
-    ) -> TokenLedger:
-        """Deduct credits and record token usage."""
-        wallet = await self.get_wallet(user_id)
+    ) -> TokenLedger | None:
+        """Deduct credits and record token usage.
+
+        Returns the ledger entry, or None when it was queued for the batched
+        ledger writer (BILLING_LEDGER_BATCHING).
+        """
+        wallet = await self.get_wallet(user_id, for_update=True)
         cost = calculate_cost_credits(total_tokens, model_name)
 
         monthly_deducted = min(wallet.monthly_remaining, cost)
@@ -136,7 +170,7 @@ class BillingService:
         metadata: dict | None,
     ) -> Subscription:
         """Grant monthly credits and upsert subscription."""
-        wallet = await self.get_wallet(user_id)
+        wallet = await self.get_wallet(user_id, for_update=True)
         wallet.monthly_remaining = settings.BILLING_MONTHLY_CREDITS
         await billing_repo.update_wallet(self.db, wallet)
 
@@ -169,7 +203,7 @@ class BillingService:
         if existing:
             return
 
-        wallet = await self.get_wallet(user_id)
+        wallet = await self.get_wallet(user_id, for_update=True)
         wallet.prepaid_balance += credits
         await billing_repo.update_wallet(self.db, wallet)
 
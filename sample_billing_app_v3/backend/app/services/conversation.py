@@ -3,6 +3,7 @@
 Contains business logic for conversation, message, and tool call operations.
 """
 
+from collections.abc import Sequence
 from datetime import UTC, datetime
 from uuid import UUID
 
@@ -197,6 +198,24 @@ class ConversationService:
             tokens_used=data.tokens_used,
         )
 
+    async def add_messages(
+        self,
+        conversation_id: UUID,
+        data: Sequence[MessageCreate],
+    ) -> list[Message]:
+        """Add several messages to a conversation in one flush.
+
+        Raises:
+            NotFoundError: If conversation does not exist.
+        """
+        # Verify conversation exists
+        await self.get_conversation(conversation_id)
+        return await conversation_repo.create_messages(
+            self.db,
+            conversation_id=conversation_id,
+            messages=data,
+        )
+
     async def delete_message(self, message_id: UUID) -> bool:
         """Delete a message.
 
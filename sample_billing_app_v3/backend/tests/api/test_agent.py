@@ -0,0 +1,130 @@
+"""Agent WebSocket connection manager tests."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api.routes.v1.agent import (
+    BACKPRESSURE_HIGH_WATER,
+    OUTBOUND_QUEUE_SIZE,
+    AgentConnectionManager,
+    _Outbox,
+)
+
+
+def _mock_websocket() -> MagicMock:
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.send_text = AsyncMock()
+    return websocket
+
+
+@pytest.mark.anyio
+async def test_send_event_is_written_by_connection_writer():
+    """Test queued events reach the socket in order."""
+    manager = AgentConnectionManager()
+    websocket = _mock_websocket()
+    await manager.connect(websocket)
+
+    assert await manager.send_event(websocket, "user_prompt", {"content": "hi"}) is True
+    assert await manager.send_event(websocket, "complete", {}) is True
+    await asyncio.sleep(0)
+
+    frames = [json.loads(call.args[0]) for call in websocket.send_text.await_args_list]
+    assert frames == [
+        {"type": "user_prompt", "data": {"content": "hi"}},
+        {"type": "complete", "data": {}},
+    ]
+    await manager.disconnect(websocket)
+
+
+@pytest.mark.anyio
+async def test_send_event_after_disconnect_returns_false():
+    """Test events for a disconnected socket are rejected."""
+    manager = AgentConnectionManager()
+    websocket = _mock_websocket()
+    await manager.connect(websocket)
+    await manager.disconnect(websocket)
+
+    assert await manager.send_event(websocket, "complete", {}) is False
+
+
+@pytest.mark.anyio
+async def test_send_event_returns_false_when_socket_fails():
+    """Test a failed write closes the connection's outbox."""
+    manager = AgentConnectionManager()
+    websocket = _mock_websocket()
+    websocket.send_text.side_effect = RuntimeError("closed")
+    await manager.connect(websocket)
+
+    await manager.send_event(websocket, "user_prompt", {"content": "hi"})
+    await asyncio.sleep(0)
+
+    assert manager.is_closed(websocket) is True
+    assert await manager.send_event(websocket, "complete", {}) is False
+    websocket.send_text.assert_awaited_once()
+    await manager.disconnect(websocket)
+
+
+@pytest.mark.anyio
+async def test_outbox_coalesces_low_value_events_when_full():
+    """Test a full outbox replaces the newest event of a coalescible type."""
+    outbox = _Outbox()
+    # One slot is taken by the backpressure marker
+    for i in range(OUTBOUND_QUEUE_SIZE - 2):
+        await outbox.put("task_started", {"n": i})
+    await outbox.put("llm_started", {"agent": "first"})
+
+    assert await outbox.put("llm_started", {"agent": "latest"}) is True
+
+    assert len(outbox) == OUTBOUND_QUEUE_SIZE
+    assert outbox.events[-1] == {"type": "llm_started", "data": {"agent": "latest"}}
+
+
+@pytest.mark.anyio
+async def test_outbox_signals_backpressure_at_high_water():
+    """Test the backpressure marker is queued once the high-water mark is hit."""
+    outbox = _Outbox()
+    for i in range(BACKPRESSURE_HIGH_WATER):
+        await outbox.put("task_started", {"n": i})
+
+    assert outbox.backpressure is True
+    assert outbox.events[-1] == {"type": "backpressure", "data": {"state": "enter"}}
+
+
+@pytest.mark.anyio
+async def test_disconnect_flushes_queued_events():
+    """Test events queued before disconnect are still written to the socket."""
+    manager = AgentConnectionManager()
+    websocket = _mock_websocket()
+    await manager.connect(websocket)
+
+    await manager.send_event(websocket, "final_result", {"output": "done"})
+    await manager.send_event(websocket, "complete", {})
+    await manager.disconnect(websocket)
+
+    frames = [json.loads(call.args[0])["type"] for call in websocket.send_text.await_args_list]
+    assert frames == ["final_result", "complete"]
+
+
+@pytest.mark.anyio
+async def test_disconnect_cancels_writer_that_cannot_drain(monkeypatch):
+    """Test a stuck socket write is cancelled after the drain timeout."""
+
+    async def stalled_send(_: str) -> None:
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr("app.api.routes.v1.agent.DISCONNECT_DRAIN_TIMEOUT", 0.01)
+    manager = AgentConnectionManager()
+    websocket = _mock_websocket()
+    websocket.send_text.side_effect = stalled_send
+    await manager.connect(websocket)
+    writer = manager.active_connections[websocket].writer
+    await manager.send_event(websocket, "complete", {})
+
+    await manager.disconnect(websocket)
+
+    assert writer is not None
+    assert writer.cancelled() is True
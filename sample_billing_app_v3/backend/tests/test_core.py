@@ -1,6 +1,8 @@
 """Tests for core modules."""
 
-from app.core.config import settings
+from pathlib import Path
+
+from app.core.config import find_env_file, settings
 from app.core.exceptions import (
     AlreadyExistsError,
     AppException,
@@ -30,6 +32,21 @@ class TestSettings:
         """Test CORS origins is a list."""
         assert isinstance(settings.CORS_ORIGINS, list)
 
+    def test_connection_urls_are_cached(self):
+        """Test connection URLs are built once per settings instance."""
+        assert settings.DATABASE_URL is settings.DATABASE_URL
+        assert settings.REDIS_URL is settings.REDIS_URL
+        assert "DATABASE_URL" in settings.model_dump()
+
+    def test_find_env_file_uses_env_override(self, monkeypatch):
+        """Test ENV_FILE override skips the directory search."""
+        monkeypatch.setenv("ENV_FILE", "/custom/path/.env")
+        find_env_file.cache_clear()
+        try:
+            assert find_env_file() == Path("/custom/path/.env")
+        finally:
+            find_env_file.cache_clear()
+
 
 class TestExceptions:
     """Tests for custom exceptions."""
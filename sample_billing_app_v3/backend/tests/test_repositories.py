@@ -173,3 +173,104 @@ class TestUserRepository:
         result = await user_repo.get_by_email(mock_session, "notfound@example.com")
 
         assert result is None
+
+
+class TestLedgerWriteQueue:
+    """Tests for the batched ledger writer."""
+
+    @pytest.fixture
+    def mock_session(self, monkeypatch):
+        """Patch the writer's session context with a mock session."""
+        from contextlib import asynccontextmanager
+
+        from app.db import session as session_module
+
+        session = MagicMock()
+        session.execute = AsyncMock()
+
+        @asynccontextmanager
+        async def fake_db_context():
+            yield session
+
+        monkeypatch.setattr(session_module, "get_db_context", fake_db_context)
+        return session
+
+    @pytest.mark.anyio
+    async def test_entries_are_inserted_in_batches(self, mock_session):
+        """Test buffered entries are written with one statement per batch."""
+        from app.repositories.ledger_writer import LedgerWriteQueue
+
+        writer = LedgerWriteQueue(batch_size=2, flush_interval=10)
+        writer.start()
+        for i in range(3):
+            await writer.put({"user_id": uuid4(), "total_tokens": i})
+        await writer.stop()
+
+        batches = [call.args[1] for call in mock_session.execute.await_args_list]
+        assert [len(batch) for batch in batches] == [2, 1]
+
+    @pytest.mark.anyio
+    async def test_put_requires_running_writer(self):
+        """Test rows are rejected instead of buffered when nothing will flush them."""
+        from app.repositories.ledger_writer import LedgerWriteQueue
+
+        writer = LedgerWriteQueue()
+
+        with pytest.raises(RuntimeError):
+            await writer.put({"user_id": uuid4(), "total_tokens": 1})
+
+    @pytest.mark.anyio
+    async def test_writer_can_be_restarted(self, mock_session):
+        """Test a stopped writer starts again with a fresh queue."""
+        from app.repositories.ledger_writer import LedgerWriteQueue
+
+        writer = LedgerWriteQueue(flush_interval=0)
+        for i in range(2):
+            writer.start()
+            await writer.put({"user_id": uuid4(), "total_tokens": i})
+            await writer.stop()
+
+        assert mock_session.execute.await_count == 2
+
+    @pytest.mark.anyio
+    async def test_failed_batch_is_retried(self, mock_session, monkeypatch):
+        """Test a transient insert failure does not drop the batch."""
+        from app.repositories import ledger_writer as ledger_writer_module
+
+        monkeypatch.setattr(ledger_writer_module, "LEDGER_RETRY_DELAY", 0)
+        mock_session.execute.side_effect = [ConnectionError("reset"), None]
+        writer = ledger_writer_module.LedgerWriteQueue(flush_interval=0)
+        writer.start()
+        await writer.put({"user_id": uuid4(), "total_tokens": 1})
+        await writer.stop()
+
+        assert mock_session.execute.await_count == 2
+
+    @pytest.mark.anyio
+    async def test_create_ledger_entry_queues_row_when_batching(self, monkeypatch):
+        """Test create_ledger_entry hands the row to the writer by default."""
+        from app.repositories import billing as billing_module
+
+        writer = MagicMock()
+        writer.put = AsyncMock()
+        monkeypatch.setattr(billing_module, "get_ledger_writer", lambda: writer)
+        monkeypatch.setattr(billing_module.settings, "BILLING_LEDGER_BATCHING", True)
+        db = MagicMock()
+        db.scalars = AsyncMock()
+
+        entry = await billing_module.create_ledger_entry(
+            db,
+            user_id=uuid4(),
+            model_name="gpt-4o-mini",
+            prompt_tokens=10,
+            completion_tokens=5,
+            total_tokens=15,
+            cost_credits=1,
+            overage_credits=0,
+            provider_request_id=None,
+            metadata=None,
+        )
+
+        assert entry is None
+        writer.put.assert_awaited_once()
+        db.scalars.assert_not_awaited()
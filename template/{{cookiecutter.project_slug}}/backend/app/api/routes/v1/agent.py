@@ -40,7 +40,7 @@ from app.core.config import settings
 {%- endif %}
 {%- if cookiecutter.enable_billing and cookiecutter.websocket_auth_jwt %}
 from app.core.exceptions import PaymentRequiredError
-from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text
+from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text{% if cookiecutter.use_postgresql and cookiecutter.enable_redis %}, invalidate_available_credits{% endif %}
 {%- if cookiecutter.use_postgresql %}
 from app.db.session import get_db_context
 {%- endif %}
@@ -203,7 +203,7 @@ async def agent_websocket(
             try:
 {%- if cookiecutter.use_postgresql %}
                 async with get_db_context() as db:
-                    billing_service = BillingService(db)
+                    billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                     await billing_service.precheck(
                         user.id, billing_model_name, estimated_total_tokens
                     )
@@ -493,7 +493,7 @@ async def agent_websocket(
                         total_tokens = (prompt_tokens_estimate or 0) + completion_tokens
 {%- if cookiecutter.use_postgresql %}
                         async with get_db_context() as db:
-                            billing_service = BillingService(db)
+                            billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                             await billing_service.commit_usage(
                                 user_id=user.id,
                                 model_name=billing_model_name,
@@ -502,6 +502,10 @@ async def agent_websocket(
                                 total_tokens=total_tokens,
                                 metadata={"channel": "websocket"},
                             )
+{%- if cookiecutter.enable_redis %}
+                        # After commit; the generation bump retires any balance cached before it
+                        await invalidate_available_credits(websocket.state.redis, user.id)
+{%- endif %}
 {%- else %}
                         with get_db_session() as db:
                             billing_service = BillingService(db)
@@ -563,7 +567,7 @@ from app.core.config import settings
 {%- endif %}
 {%- if cookiecutter.enable_billing and cookiecutter.websocket_auth_jwt %}
 from app.core.exceptions import PaymentRequiredError
-from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text
+from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text{% if cookiecutter.use_postgresql and cookiecutter.enable_redis %}, invalidate_available_credits{% endif %}
 {%- if cookiecutter.use_postgresql %}
 from app.db.session import get_db_context
 {%- endif %}
@@ -730,7 +734,7 @@ async def agent_websocket(
             try:
 {%- if cookiecutter.use_postgresql %}
                 async with get_db_context() as db:
-                    billing_service = BillingService(db)
+                    billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                     await billing_service.precheck(
                         user.id, billing_model_name, estimated_total_tokens
                     )
@@ -1009,7 +1013,7 @@ async def agent_websocket(
                         total_tokens = (prompt_tokens_estimate or 0) + completion_tokens
 {%- if cookiecutter.use_postgresql %}
                         async with get_db_context() as db:
-                            billing_service = BillingService(db)
+                            billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                             await billing_service.commit_usage(
                                 user_id=user.id,
                                 model_name=billing_model_name,
@@ -1018,6 +1022,10 @@ async def agent_websocket(
                                 total_tokens=total_tokens,
                                 metadata={"channel": "websocket"},
                             )
+{%- if cookiecutter.enable_redis %}
+                        # After commit; the generation bump retires any balance cached before it
+                        await invalidate_available_credits(websocket.state.redis, user.id)
+{%- endif %}
 {%- else %}
                         with get_db_session() as db:
                             billing_service = BillingService(db)
@@ -1079,7 +1087,7 @@ from app.core.config import settings
 {%- endif %}
 {%- if cookiecutter.enable_billing and cookiecutter.websocket_auth_jwt %}
 from app.core.exceptions import PaymentRequiredError
-from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text
+from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text{% if cookiecutter.use_postgresql and cookiecutter.enable_redis %}, invalidate_available_credits{% endif %}
 {%- if cookiecutter.use_postgresql %}
 from app.db.session import get_db_context
 {%- endif %}
@@ -1247,7 +1255,7 @@ async def agent_websocket(
             try:
 {%- if cookiecutter.use_postgresql %}
                 async with get_db_context() as db:
-                    billing_service = BillingService(db)
+                    billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                     await billing_service.precheck(
                         user.id, billing_model_name, estimated_total_tokens
                     )
@@ -1529,7 +1537,7 @@ async def agent_websocket(
                         total_tokens = (prompt_tokens_estimate or 0) + completion_tokens
 {%- if cookiecutter.use_postgresql %}
                         async with get_db_context() as db:
-                            billing_service = BillingService(db)
+                            billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                             await billing_service.commit_usage(
                                 user_id=user.id,
                                 model_name=billing_model_name,
@@ -1538,6 +1546,10 @@ async def agent_websocket(
                                 total_tokens=total_tokens,
                                 metadata={"channel": "websocket"},
                             )
+{%- if cookiecutter.enable_redis %}
+                        # After commit; the generation bump retires any balance cached before it
+                        await invalidate_available_credits(websocket.state.redis, user.id)
+{%- endif %}
 {%- else %}
                         with get_db_session() as db:
                             billing_service = BillingService(db)
@@ -1597,7 +1609,7 @@ from app.core.config import settings
 {%- endif %}
 {%- if cookiecutter.enable_billing and cookiecutter.websocket_auth_jwt %}
 from app.core.exceptions import PaymentRequiredError
-from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text
+from app.services.billing import BillingService, estimate_prompt_tokens, estimate_tokens_from_text{% if cookiecutter.use_postgresql and cookiecutter.enable_redis %}, invalidate_available_credits{% endif %}
 {%- if cookiecutter.use_postgresql %}
 from app.db.session import get_db_context
 {%- endif %}
@@ -1748,7 +1760,7 @@ async def agent_websocket(
             try:
 {%- if cookiecutter.use_postgresql %}
                 async with get_db_context() as db:
-                    billing_service = BillingService(db)
+                    billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                     await billing_service.precheck(
                         user.id, billing_model_name, estimated_total_tokens
                     )
@@ -2068,7 +2080,7 @@ async def agent_websocket(
                         total_tokens = (prompt_tokens_estimate or 0) + completion_tokens
 {%- if cookiecutter.use_postgresql %}
                         async with get_db_context() as db:
-                            billing_service = BillingService(db)
+                            billing_service = BillingService(db{% if cookiecutter.enable_redis %}, redis=websocket.state.redis{% endif %})
                             await billing_service.commit_usage(
                                 user_id=user.id,
                                 model_name=billing_model_name,
@@ -2077,6 +2089,10 @@ async def agent_websocket(
                                 total_tokens=total_tokens,
                                 metadata={"channel": "websocket"},
                             )
+{%- if cookiecutter.enable_redis %}
+                        # After commit; the generation bump retires any balance cached before it
+                        await invalidate_available_credits(websocket.state.redis, user.id)
+{%- endif %}
 {%- else %}
                         with get_db_session() as db:
                             billing_service = BillingService(db)
@@ -1,32 +1,36 @@
 {%- if cookiecutter.enable_billing and cookiecutter.use_postgresql and cookiecutter.use_sqlalchemy and cookiecutter.use_jwt %}
 """Billing API routes (PostgreSQL async)."""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
 from app.api.deps import BillingSvc, get_current_user
 from app.core.config import settings
 from app.db.models.user import User
-from app.schemas.billing import BillingCreditPack, BillingSummary, CheckoutRequest, CheckoutResponse
+from app.schemas.billing import BillingSummary, CheckoutRequest, CheckoutResponse
 
 router = APIRouter()
 
 
-@router.get("/billing/summary", response_model=BillingSummary)
+@router.get("/billing/summary", responses={200: {"model": BillingSummary}})
 async def get_billing_summary(
     billing_service: BillingSvc,
     user: User = Depends(get_current_user),
-) -> BillingSummary:
-    """Get billing summary for the current user."""
-    wallet = await billing_service.get_wallet(user.id)
-    subscription = await billing_service.get_subscription(user.id)
-    ledger = await billing_service.list_ledger(user.id, limit=20)
-    packs = [BillingCreditPack(**pack) for pack in billing_service.get_credit_packs()]
-    return BillingSummary(
-        wallet=wallet,
-        subscription=subscription,
-        credit_packs=packs,
-        recent_ledger=ledger,
+) -> Response:
+    """Get billing summary for the current user.
+
+    The summary is validated once and serialized straight to JSON; there is
+    no ``response_model`` so FastAPI does not validate it a second time.
+    """
+    wallet, subscription, ledger = await billing_service.get_summary(user.id, ledger_limit=20)
+    summary = BillingSummary.model_validate(
+        {
+            "wallet": wallet,
+            "subscription": subscription,
+            "credit_packs": billing_service.get_credit_packs(),
+            "recent_ledger": ledger,
+        }
     )
+    return Response(content=summary.model_dump_json(), media_type="application/json")
 
 
 @router.post("/billing/checkout", response_model=CheckoutResponse)
@@ -47,32 +51,36 @@ async def create_checkout(
 {%- elif cookiecutter.enable_billing and cookiecutter.use_sqlite and cookiecutter.use_sqlalchemy and cookiecutter.use_jwt %}
 """Billing API routes (SQLite sync)."""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
 from app.api.deps import BillingSvc, get_current_user
 from app.core.config import settings
 from app.db.models.user import User
-from app.schemas.billing import BillingCreditPack, BillingSummary, CheckoutRequest, CheckoutResponse
+from app.schemas.billing import BillingSummary, CheckoutRequest, CheckoutResponse
 
 router = APIRouter()
 
 
-@router.get("/billing/summary", response_model=BillingSummary)
+@router.get("/billing/summary", responses={200: {"model": BillingSummary}})
 def get_billing_summary(
     billing_service: BillingSvc,
     user: User = Depends(get_current_user),
-) -> BillingSummary:
-    """Get billing summary for the current user."""
-    wallet = billing_service.get_wallet(user.id)
-    subscription = billing_service.get_subscription(user.id)
-    ledger = billing_service.list_ledger(user.id, limit=20)
-    packs = [BillingCreditPack(**pack) for pack in billing_service.get_credit_packs()]
-    return BillingSummary(
-        wallet=wallet,
-        subscription=subscription,
-        credit_packs=packs,
-        recent_ledger=ledger,
+) -> Response:
+    """Get billing summary for the current user.
+
+    The summary is validated once and serialized straight to JSON; there is
+    no ``response_model`` so FastAPI does not validate it a second time.
+    """
+    wallet, subscription, ledger = billing_service.get_summary(user.id, ledger_limit=20)
+    summary = BillingSummary.model_validate(
+        {
+            "wallet": wallet,
+            "subscription": subscription,
+            "credit_packs": billing_service.get_credit_packs(),
+            "recent_ledger": ledger,
+        }
     )
+    return Response(content=summary.model_dump_json(), media_type="application/json")
 
 
 @router.post("/billing/checkout", response_model=CheckoutResponse)
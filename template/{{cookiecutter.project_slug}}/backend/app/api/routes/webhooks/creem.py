@@ -1,47 +1,83 @@
 {%- if cookiecutter.enable_billing and cookiecutter.use_billing_creem and cookiecutter.use_postgresql and cookiecutter.use_sqlalchemy %}
 """Creem webhook handler (PostgreSQL async)."""
 
+import re
+from collections import ChainMap
+from collections.abc import Mapping
+from types import MappingProxyType
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.billing.providers import creem
 from app.core.config import settings
-from app.db.session import get_db_context
-from app.services.billing import BillingService
+from app.services.billing import BillingService{% if cookiecutter.enable_redis %}, invalidate_available_credits{% endif %}, webhook_batcher
 
 router = APIRouter()
 
+# Creem events are a few KiB; anything larger is rejected before buffering
+MAX_WEBHOOK_BODY_BYTES = 64 * 1024
+
+# Cheap byte scan so unhandled event types skip the full JSON parse
+_CHECKOUT_COMPLETED_RE = re.compile(rb'"eventType"\s*:\s*"checkout\.completed"')
+
+# Products that grant the monthly allowance (a set so more plans can be added)
+_SUBSCRIPTION_PRODUCT_IDS: frozenset[str] = frozenset(
+    filter(None, [settings.CREEM_SUBSCRIPTION_PRODUCT_ID])
+)
+
+# Provider product ID -> credits; reversed so the first configured pack wins
+_PACK_CREDITS_BY_PRODUCT: Mapping[str, int] = MappingProxyType(
+    {
+        pack.provider_product_id: pack.credits
+        for pack in reversed(settings.BILLING_CREDIT_PACKS)
+        if pack.provider_product_id
+    }
+)
+
 
 def _resolve_pack_credits(product_id: str | None) -> int | None:
     if not product_id:
         return None
-    for pack in settings.BILLING_CREDIT_PACKS:
-        if pack.get("provider_product_id") == product_id:
-            return int(pack.get("credits", 0))
-    return None
+    return _PACK_CREDITS_BY_PRODUCT.get(product_id)
+
+
+async def _read_body(request: Request) -> bytes:
+    """Read the request body, enforcing MAX_WEBHOOK_BODY_BYTES."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_WEBHOOK_BODY_BYTES:
+        raise HTTPException(status_code=413, detail="Payload too large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_WEBHOOK_BODY_BYTES:
+            raise HTTPException(status_code=413, detail="Payload too large")
+    return bytes(body)
 
 
 @router.post("/webhooks/creem")
 async def creem_webhook(request: Request) -> dict:
     """Handle Creem checkout.completed events."""
-    payload = await request.body()
+    payload = await _read_body(request)
     signature = request.headers.get(creem.CREEM_SIGNATURE_HEADER, "")
 
     if not creem.verify_signature(payload, signature, settings.CREEM_WEBHOOK_SECRET):
         raise HTTPException(status_code=400, detail="Invalid signature")
 
+    if not _CHECKOUT_COMPLETED_RE.search(payload):
+        return {"status": "ignored"}
+
     event = creem.parse_event(payload)
     if event.get("eventType") != "checkout.completed":
         return {"status": "ignored"}
 
     data = event.get("object", {})
-    metadata = data.get("metadata") or {}
-    subscription_meta = None
-    if isinstance(data.get("subscription"), dict):
-        subscription_meta = data["subscription"].get("metadata")
-    if subscription_meta:
-        metadata.update(subscription_meta)
+    subscription = data.get("subscription")
+    if not isinstance(subscription, dict):
+        subscription = None
+    # Subscription metadata wins; ChainMap avoids copying or mutating the payload
+    metadata = ChainMap((subscription or {}).get("metadata") or {}, data.get("metadata") or {})
 
     user_id_raw = metadata.get("user_id") or metadata.get("internal_customer_id")
     if not user_id_raw:
@@ -53,58 +89,66 @@ async def creem_webhook(request: Request) -> dict:
     billing_type = product.get("billing_type") or order.get("type")
     amount_raw = order.get("amount")
     currency = order.get("currency")
-    amount = None
-    if isinstance(amount_raw, (int, float)):
-        amount = float(amount_raw) / 100
+    amount_minor = int(amount_raw) if isinstance(amount_raw, (int, float)) else None
 
     try:
         user_id = UUID(user_id_raw)
     except ValueError:
         return {"status": "ignored", "reason": "invalid_user_id"}
 
-    async with get_db_context() as db:
-        service = BillingService(db)
+    is_subscription = billing_type == "recurring" or product_id in _SUBSCRIPTION_PRODUCT_IDS
+    credits = 0 if is_subscription else _resolve_pack_credits(product_id)
+    if not is_subscription and not credits:
+        return {"status": "ignored", "reason": "unknown_pack"}
 
-        if billing_type == "recurring" or product_id == settings.CREEM_SUBSCRIPTION_PRODUCT_ID:
-            await service.grant_monthly_allowance(
+    external_id = event.get("id", "")
+
+    async def apply(db: AsyncSession) -> bool:
+        service = BillingService(db)
+        if is_subscription:
+            return await service.apply_subscription_event(
                 user_id=user_id,
                 provider="creem",
-                provider_subscription_id=(data.get("subscription") or {}).get("id")
-                if isinstance(data.get("subscription"), dict)
-                else None,
+                external_id=external_id,
+                provider_subscription_id=subscription.get("id") if subscription else None,
                 status="active",
                 plan_name=product.get("name"),
                 current_period_start=None,
                 current_period_end=None,
-                metadata=metadata,
-            )
-            await service.record_subscription_payment(
-                user_id=user_id,
-                provider="creem",
-                external_id=event.get("id", ""),
-                amount=amount,
-                currency=currency,
-                metadata=metadata,
-            )
-        else:
-            credits = _resolve_pack_credits(product_id)
-            if not credits:
-                return {"status": "ignored", "reason": "unknown_pack"}
-            await service.apply_pack_purchase(
-                user_id=user_id,
-                provider="creem",
-                external_id=event.get("id", ""),
-                credits=credits,
-                amount=amount,
+                amount_minor=amount_minor,
                 currency=currency,
-                metadata=metadata,
+                metadata=dict(metadata),
             )
+        return await service.apply_pack_purchase(
+            user_id=user_id,
+            provider="creem",
+            external_id=external_id,
+            credits=credits,
+            amount_minor=amount_minor,
+            currency=currency,
+            metadata=dict(metadata),
+        )
+
+    # Returns only after the shared transaction has committed; False means the
+    # payment row already existed (a redelivery), so nothing was changed
+    if not await webhook_batcher.submit(apply):
+        return {"status": "ok", "dedup": True}
+{%- if cookiecutter.enable_redis %}
+
+    # After commit; the generation bump retires any balance cached before it
+    await invalidate_available_credits(request.state.redis, user_id)
+{%- endif %}
 
     return {"status": "ok"}
 
 {%- elif cookiecutter.enable_billing and cookiecutter.use_billing_creem and cookiecutter.use_sqlite and cookiecutter.use_sqlalchemy %}
 """Creem webhook handler (SQLite sync)."""
 
+import re
+from collections import ChainMap
+from collections.abc import Mapping
+from types import MappingProxyType
+
 from fastapi import APIRouter, HTTPException, Request
 
 from app.billing.providers import creem
@@ -114,36 +158,68 @@ from app.services.billing import BillingService
 
 router = APIRouter()
 
+# Creem events are a few KiB; anything larger is rejected before buffering
+MAX_WEBHOOK_BODY_BYTES = 64 * 1024
+
+# Cheap byte scan so unhandled event types skip the full JSON parse
+_CHECKOUT_COMPLETED_RE = re.compile(rb'"eventType"\s*:\s*"checkout\.completed"')
+
+# Products that grant the monthly allowance (a set so more plans can be added)
+_SUBSCRIPTION_PRODUCT_IDS: frozenset[str] = frozenset(
+    filter(None, [settings.CREEM_SUBSCRIPTION_PRODUCT_ID])
+)
+
+# Provider product ID -> credits; reversed so the first configured pack wins
+_PACK_CREDITS_BY_PRODUCT: Mapping[str, int] = MappingProxyType(
+    {
+        pack.provider_product_id: pack.credits
+        for pack in reversed(settings.BILLING_CREDIT_PACKS)
+        if pack.provider_product_id
+    }
+)
+
 
 def _resolve_pack_credits(product_id: str | None) -> int | None:
     if not product_id:
         return None
-    for pack in settings.BILLING_CREDIT_PACKS:
-        if pack.get("provider_product_id") == product_id:
-            return int(pack.get("credits", 0))
-    return None
+    return _PACK_CREDITS_BY_PRODUCT.get(product_id)
+
+
+async def _read_body(request: Request) -> bytes:
+    """Read the request body, enforcing MAX_WEBHOOK_BODY_BYTES."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_WEBHOOK_BODY_BYTES:
+        raise HTTPException(status_code=413, detail="Payload too large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_WEBHOOK_BODY_BYTES:
+            raise HTTPException(status_code=413, detail="Payload too large")
+    return bytes(body)
 
 
 @router.post("/webhooks/creem")
 async def creem_webhook(request: Request) -> dict:
     """Handle Creem checkout.completed events."""
-    payload = await request.body()
+    payload = await _read_body(request)
     signature = request.headers.get(creem.CREEM_SIGNATURE_HEADER, "")
 
     if not creem.verify_signature(payload, signature, settings.CREEM_WEBHOOK_SECRET):
         raise HTTPException(status_code=400, detail="Invalid signature")
 
+    if not _CHECKOUT_COMPLETED_RE.search(payload):
+        return {"status": "ignored"}
+
     event = creem.parse_event(payload)
     if event.get("eventType") != "checkout.completed":
         return {"status": "ignored"}
 
     data = event.get("object", {})
-    metadata = data.get("metadata") or {}
-    subscription_meta = None
-    if isinstance(data.get("subscription"), dict):
-        subscription_meta = data["subscription"].get("metadata")
-    if subscription_meta:
-        metadata.update(subscription_meta)
+    subscription = data.get("subscription")
+    if not isinstance(subscription, dict):
+        subscription = None
+    # Subscription metadata wins; ChainMap avoids copying or mutating the payload
+    metadata = ChainMap((subscription or {}).get("metadata") or {}, data.get("metadata") or {})
 
     user_id = metadata.get("user_id") or metadata.get("internal_customer_id")
     if not user_id:
@@ -155,48 +231,41 @@ async def creem_webhook(request: Request) -> dict:
     billing_type = product.get("billing_type") or order.get("type")
     amount_raw = order.get("amount")
     currency = order.get("currency")
-    amount = None
-    if isinstance(amount_raw, (int, float)):
-        amount = float(amount_raw) / 100
+    amount_minor = int(amount_raw) if isinstance(amount_raw, (int, float)) else None
 
+    external_id = event.get("id", "")
     with get_db_session() as db:
         service = BillingService(db)
-
-        if billing_type == "recurring" or product_id == settings.CREEM_SUBSCRIPTION_PRODUCT_ID:
-            service.grant_monthly_allowance(
+        if billing_type == "recurring" or product_id in _SUBSCRIPTION_PRODUCT_IDS:
+            applied = service.apply_subscription_event(
                 user_id=user_id,
                 provider="creem",
-                provider_subscription_id=(data.get("subscription") or {}).get("id")
-                if isinstance(data.get("subscription"), dict)
-                else None,
+                external_id=external_id,
+                provider_subscription_id=subscription.get("id") if subscription else None,
                 status="active",
                 plan_name=product.get("name"),
                 current_period_start=None,
                 current_period_end=None,
-                metadata=metadata,
-            )
-            service.record_subscription_payment(
-                user_id=user_id,
-                provider="creem",
-                external_id=event.get("id", ""),
-                amount=amount,
+                amount_minor=amount_minor,
                 currency=currency,
-                metadata=metadata,
+                metadata=dict(metadata),
             )
         else:
             credits = _resolve_pack_credits(product_id)
             if not credits:
                 return {"status": "ignored", "reason": "unknown_pack"}
-            service.apply_pack_purchase(
+            applied = service.apply_pack_purchase(
                 user_id=user_id,
                 provider="creem",
-                external_id=event.get("id", ""),
+                external_id=external_id,
                 credits=credits,
-                amount=amount,
+                amount_minor=amount_minor,
                 currency=currency,
-                metadata=metadata,
+                metadata=dict(metadata),
             )
 
+    if not applied:
+        return {"status": "ok", "dedup": True}
     return {"status": "ok"}
 
 {%- else %}
@@ -1,5 +1,18 @@
-"""Billing provider adapters."""
+"""Billing provider adapters.
 
-from app.billing.providers import creem, stripe, alipay, wechat
+Providers are imported on first access (PEP 562), so a deployment only
+loads the adapter it is configured to use.
+"""
 
-__all__ = ["creem", "stripe", "alipay", "wechat"]
+import importlib
+from types import ModuleType
+
+__all__ = ["alipay", "creem", "stripe", "wechat"]
+
+
+def __getattr__(name: str) -> ModuleType:
+    if name in __all__:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
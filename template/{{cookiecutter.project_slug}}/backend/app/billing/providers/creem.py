@@ -5,28 +5,88 @@ from __future__ import annotations
 
 import hashlib
 import hmac
+{%- if not cookiecutter.enable_orjson %}
 import json
+{%- endif %}
+from functools import lru_cache
 from typing import Any
 
 import httpx
+{%- if cookiecutter.enable_orjson %}
+import orjson
+{%- endif %}
 
 from app.core.config import settings
 from app.core.exceptions import ExternalServiceError
 
 CREEM_SIGNATURE_HEADER = "creem-signature"
+CREEM_TIMEOUT = 15
+CREEM_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+# Shared clients keep TLS connections to Creem alive between checkouts
+_async_client: httpx.AsyncClient | None = None
+_sync_client: httpx.Client | None = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            base_url=settings.CREEM_API_BASE_URL, timeout=CREEM_TIMEOUT, limits=CREEM_LIMITS
+        )
+    return _async_client
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(
+            base_url=settings.CREEM_API_BASE_URL, timeout=CREEM_TIMEOUT, limits=CREEM_LIMITS
+        )
+    return _sync_client
+
+
+async def close_clients() -> None:
+    """Close the shared Creem HTTP clients."""
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+@lru_cache(maxsize=4)
+def _secret_bytes(secret: str) -> bytes:
+    return secret.encode("utf-8")
 
 
 def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
-    """Verify Creem webhook signature using HMAC-SHA256."""
+    """Verify Creem webhook signature using HMAC-SHA256.
+
+    The hex signature is decoded once and compared to the raw digest with
+    ``hmac.compare_digest``, which stays constant-time.
+    """
     if not secret:
         return False
-    computed = hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
-    return hmac.compare_digest(computed, signature)
+    try:
+        expected = bytes.fromhex(signature)
+    except ValueError:
+        return False
+    if len(expected) != hashlib.sha256().digest_size:
+        return False
+    computed = hmac.new(_secret_bytes(secret), payload, hashlib.sha256).digest()
+    return hmac.compare_digest(computed, expected)
 
 
 def parse_event(payload: bytes) -> dict[str, Any]:
     """Parse a webhook payload."""
-    return json.loads(payload.decode("utf-8"))
+{%- if cookiecutter.enable_orjson %}
+    return orjson.loads(payload)
+{%- else %}
+    return json.loads(payload)
+{%- endif %}
 
 
 async def create_checkout_session(
@@ -50,17 +110,15 @@ async def create_checkout_session(
     if customer_email:
         payload["customer"] = {"email": customer_email}
 
-    url = f"{settings.CREEM_API_BASE_URL}/v1/checkouts"
     headers = {"x-api-key": settings.CREEM_API_KEY}
 
-    async with httpx.AsyncClient(timeout=15) as client:
-        response = await client.post(url, json=payload, headers=headers)
-        if response.status_code >= 400:
-            raise ExternalServiceError(
-                message=f"Creem checkout failed: {response.text}",
-                details={"status": response.status_code},
-            )
-        return response.json()
+    response = await _get_async_client().post("/v1/checkouts", json=payload, headers=headers)
+    if response.status_code >= 400:
+        raise ExternalServiceError(
+            message=f"Creem checkout failed: {response.text}",
+            details={"status": response.status_code},
+        )
+    return response.json()
 
 
 def create_checkout_session_sync(
@@ -84,17 +142,15 @@ def create_checkout_session_sync(
     if customer_email:
         payload["customer"] = {"email": customer_email}
 
-    url = f"{settings.CREEM_API_BASE_URL}/v1/checkouts"
     headers = {"x-api-key": settings.CREEM_API_KEY}
 
-    with httpx.Client(timeout=15) as client:
-        response = client.post(url, json=payload, headers=headers)
-        if response.status_code >= 400:
-            raise ExternalServiceError(
-                message=f"Creem checkout failed: {response.text}",
-                details={"status": response.status_code},
-            )
-        return response.json()
+    response = _get_sync_client().post("/v1/checkouts", json=payload, headers=headers)
+    if response.status_code >= 400:
+        raise ExternalServiceError(
+            message=f"Creem checkout failed: {response.text}",
+            details={"status": response.status_code},
+        )
+    return response.json()
 
 {%- else %}
 """Creem provider - not configured."""
@@ -3,13 +3,16 @@
 # ruff: noqa: I001 - Imports structured for Jinja2 template conditionals
 {% endif %}
 from pathlib import Path
-from typing import Any, Literal
+from typing import Literal
 
 {% if cookiecutter.use_database or cookiecutter.enable_redis -%}
 from pydantic import computed_field, field_validator{% if cookiecutter.use_jwt or cookiecutter.use_api_key or cookiecutter.enable_cors %}, ValidationInfo{% endif %}
 {% else -%}
 from pydantic import field_validator{% if cookiecutter.use_jwt or cookiecutter.use_api_key or cookiecutter.enable_cors %}, ValidationInfo{% endif %}
 {% endif -%}
+{% if cookiecutter.enable_billing -%}
+from pydantic import BaseModel, ConfigDict
+{% endif -%}
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,6 +25,19 @@ def find_env_file() -> Path | None:
             return env_file
     return None
 
+{%- if cookiecutter.enable_billing %}
+
+
+class CreditPackConfig(BaseModel):
+    """Credit pack definition, validated and coerced once when settings load."""
+
+    model_config = ConfigDict(frozen=True)
+
+    credits: int
+    price_usd: float = 0.0
+    provider_product_id: str = ""
+{%- endif %}
+
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -145,9 +161,9 @@ class Settings(BaseSettings):
     BILLING_TOKENS_PER_CREDIT: int = 1000
     BILLING_CHARS_PER_TOKEN: int = 4
     BILLING_OUTPUT_TOKENS_ESTIMATE: int = 512
-    BILLING_CREDIT_PACKS: list[dict[str, Any]] = [
-        {"credits": 2000, "price_usd": 9.9, "provider_product_id": ""},
-        {"credits": 5000, "price_usd": 19.9, "provider_product_id": ""},
+    BILLING_CREDIT_PACKS: list[CreditPackConfig] = [
+        CreditPackConfig(credits=2000, price_usd=9.9),
+        CreditPackConfig(credits=5000, price_usd=19.9),
     ]
     BILLING_MODEL_MULTIPLIERS: dict[str, float] = {"default": 1.0}
     BILLING_PROVIDER: str = "{{ cookiecutter.billing_provider }}"
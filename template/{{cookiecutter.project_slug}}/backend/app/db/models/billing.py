@@ -1,19 +1,37 @@
 {%- if cookiecutter.enable_billing and cookiecutter.use_sqlalchemy and (cookiecutter.use_postgresql or cookiecutter.use_sqlite) %}
-"""Billing models for token usage and payments."""
+"""Billing models for token usage and payments.
+
+The `user` relationships use lazy="raise": load them explicitly with
+`selectinload(...)` when needed instead of triggering a query per row.
+"""
 
 import uuid
 from datetime import datetime
 from typing import Any
+{%- if cookiecutter.use_postgresql %}
 
-from sqlalchemy import DateTime, ForeignKey, Integer, JSON, Numeric, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+{%- else %}
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, JSON, String
+{%- endif %}
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 {%- if cookiecutter.use_postgresql %}
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 {%- endif %}
 
 from app.db.base import Base, TimestampMixin
 from app.db.models.user import User
 
+{%- if cookiecutter.use_postgresql %}
+
+# JSONB is stored parsed, so reads skip re-parsing the metadata text
+MetadataJSON = JSONB
+{%- else %}
+
+MetadataJSON = JSON
+{%- endif %}
+
 
 class CreditWallet(Base, TimestampMixin):
     """User credit balances (monthly + prepaid)."""
@@ -36,7 +54,7 @@ class CreditWallet(Base, TimestampMixin):
     monthly_remaining: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     prepaid_balance: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return (
@@ -46,7 +64,7 @@ class CreditWallet(Base, TimestampMixin):
 
 
 class Subscription(Base, TimestampMixin):
-    """Subscription state for monthly credit grants."""
+    """Subscription state for monthly credit grants (one row per user)."""
 
     __tablename__ = "subscriptions"
 
@@ -55,11 +73,13 @@ class Subscription(Base, TimestampMixin):
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), index=True
+        UUID(as_uuid=True), ForeignKey("users.id"), unique=True, index=True
     )
 {%- else %}
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), index=True)
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id"), unique=True, index=True
+    )
 {%- endif %}
     provider: Mapped[str] = mapped_column(String(50), default="creem", index=True)
     provider_subscription_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -72,9 +92,9 @@ class Subscription(Base, TimestampMixin):
     current_period_end: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
-    metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", JSON, nullable=True)
+    metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", MetadataJSON, nullable=True)
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return f"<Subscription(user_id={self.user_id}, provider={self.provider}, status={self.status})>"
@@ -84,17 +104,17 @@ class TokenLedger(Base, TimestampMixin):
     """Ledger entry for token usage and cost."""
 
     __tablename__ = "token_ledgers"
+    # Serves "latest rows for a user" as an ordered range scan (also covers user_id lookups)
+    __table_args__ = (Index("token_ledgers_user_id_created_at_idx", "user_id", "created_at"),)
 
 {%- if cookiecutter.use_postgresql %}
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), index=True
-    )
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"))
 {%- else %}
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), index=True)
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"))
 {%- endif %}
     model_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     prompt_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -103,9 +123,9 @@ class TokenLedger(Base, TimestampMixin):
     cost_credits: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     overage_credits: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     provider_request_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
-    metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", JSON, nullable=True)
+    metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", MetadataJSON, nullable=True)
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return (
@@ -118,28 +138,31 @@ class PaymentTransaction(Base, TimestampMixin):
     """Payment transactions (subscriptions and credit packs)."""
 
     __tablename__ = "payment_transactions"
+    # Serves per-user provider/status lookups (also covers user_id lookups)
+    __table_args__ = (
+        Index("payment_transactions_user_id_provider_status_idx", "user_id", "provider", "status"),
+    )
 
 {%- if cookiecutter.use_postgresql %}
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), index=True
-    )
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"))
 {%- else %}
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), index=True)
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"))
 {%- endif %}
     provider: Mapped[str] = mapped_column(String(50), default="creem", index=True)
     external_id: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     kind: Mapped[str] = mapped_column(String(50), default="credit_pack")
     status: Mapped[str] = mapped_column(String(50), default="completed")
-    amount: Mapped[float | None] = mapped_column(Numeric(10, 2), nullable=True)
+    # Integer minor units (e.g. cents), as sent by the payment provider
+    amount_minor: Mapped[int | None] = mapped_column(Integer, nullable=True)
     currency: Mapped[str | None] = mapped_column(String(10), nullable=True)
     credits_granted: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
-    metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", JSON, nullable=True)
+    metadata_: Mapped[dict[str, Any] | None] = mapped_column("metadata", MetadataJSON, nullable=True)
 
-    user: Mapped["User"] = relationship("User")
+    user: Mapped["User"] = relationship("User", lazy="raise")
 
     def __repr__(self) -> str:
         return (
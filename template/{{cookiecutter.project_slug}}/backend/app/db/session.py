@@ -86,19 +86,35 @@ async def close_db() -> None:
 {%- elif cookiecutter.use_sqlite %}
 """Sync SQLite database session."""
 
+import os
 from collections.abc import Generator
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
+# Pooled connections stay open, so SQLite's page cache stays warm between requests
+SQLITE_POOL_SIZE = min((os.cpu_count() or 1) * 2, 16)
+
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False},
     echo=settings.DEBUG,
+    pool_size=SQLITE_POOL_SIZE,
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Use WAL so readers do not block the writer."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -83,6 +83,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[{% if cookiecutter.enable_red
     setup_cache(redis_client)
 {%- endif %}
 
+{%- if cookiecutter.enable_billing and cookiecutter.use_postgresql %}
+    from app.services.billing import webhook_batcher
+    webhook_batcher.start()
+{%- endif %}
+
 {%- if cookiecutter.enable_redis %}
 
     yield {"redis": redis_client}
@@ -95,6 +100,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[{% if cookiecutter.enable_red
 
     # === Shutdown ===
 {%- endif %}
+{%- if cookiecutter.enable_billing %}
+    from app.billing.providers.creem import close_clients
+    await close_clients()
+{%- endif %}
+
+
+{%- if cookiecutter.enable_billing and cookiecutter.use_postgresql %}
+    from app.services.billing import webhook_batcher
+    await webhook_batcher.stop()
+{%- endif %}
+
 {%- if cookiecutter.use_postgresql %}
     from app.db.session import close_db
     await close_db()
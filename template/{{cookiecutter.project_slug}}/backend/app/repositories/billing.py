@@ -1,46 +1,80 @@
 {%- if cookiecutter.enable_billing and cookiecutter.use_postgresql and cookiecutter.use_sqlalchemy %}
 """Billing repository (PostgreSQL async)."""
 
+from collections.abc import Sequence
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import desc, select
+from sqlalchemy import RowMapping, bindparam, desc, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.models.billing import CreditWallet, PaymentTransaction, Subscription, TokenLedger
 
+# Hot read queries are built once; values are supplied as bind parameters
+_WALLET_BY_USER = select(CreditWallet).where(CreditWallet.user_id == bindparam("user_id"))
+_LATEST_SUBSCRIPTION = (
+    select(Subscription)
+    .where(Subscription.user_id == bindparam("user_id"))
+    .order_by(desc(Subscription.created_at))
+    .limit(1)
+)
+# Core select of the serialized columns only: no ORM instances are built and
+# the per-row metadata JSON is never decoded
+_ledger = TokenLedger.__table__.c
+_RECENT_LEDGER = (
+    select(
+        _ledger.id,
+        _ledger.model_name,
+        _ledger.prompt_tokens,
+        _ledger.completion_tokens,
+        _ledger.total_tokens,
+        _ledger.cost_credits,
+        _ledger.overage_credits,
+        _ledger.created_at,
+        _ledger.updated_at,
+    )
+    .where(_ledger.user_id == bindparam("user_id"))
+    .order_by(desc(_ledger.created_at))
+    .limit(bindparam("limit"))
+)
+
 
 async def get_wallet_by_user_id(db: AsyncSession, user_id: UUID) -> CreditWallet | None:
     """Get wallet by user ID."""
-    result = await db.execute(select(CreditWallet).where(CreditWallet.user_id == user_id))
+    result = await db.execute(_WALLET_BY_USER, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 
-async def create_wallet(
-    db: AsyncSession,
-    *,
-    user_id: UUID,
-    monthly_remaining: int = 0,
-    prepaid_balance: int = 0,
-) -> CreditWallet:
-    """Create a wallet for a user."""
-    wallet = CreditWallet(
-        user_id=user_id,
-        monthly_remaining=monthly_remaining,
-        prepaid_balance=prepaid_balance,
+async def get_or_create_wallet(db: AsyncSession, user_id: UUID) -> CreditWallet:
+    """Get the user's wallet, creating it if missing.
+
+    Reads first, so an existing wallet costs one SELECT and no row write. A
+    missing one is inserted with ON CONFLICT DO NOTHING; if a concurrent
+    request created it first, its row is read back instead.
+    """
+    wallet = await get_wallet_by_user_id(db, user_id)
+    if wallet is not None:
+        return wallet
+    stmt = (
+        pg_insert(CreditWallet)
+        .values(user_id=user_id, monthly_remaining=0, prepaid_balance=0)
+        .on_conflict_do_nothing(index_elements=[CreditWallet.user_id])
+        .returning(CreditWallet)
     )
-    db.add(wallet)
-    await db.flush()
-    await db.refresh(wallet)
+    wallet = (await db.scalars(stmt)).one_or_none()
+    if wallet is None:
+        wallet = (await db.execute(_WALLET_BY_USER, {"user_id": user_id})).scalar_one()
     return wallet
 
 
-async def update_wallet(db: AsyncSession, wallet: CreditWallet) -> CreditWallet:
-    """Persist wallet changes."""
-    db.add(wallet)
-    await db.flush()
-    await db.refresh(wallet)
-    return wallet
+def _deduction_values(monthly: int, prepaid: int) -> dict:
+    """SET clauses for a credit deduction that never drive a balance negative."""
+    return {
+        "monthly_remaining": func.greatest(CreditWallet.monthly_remaining - monthly, 0),
+        "prepaid_balance": func.greatest(CreditWallet.prepaid_balance - prepaid, 0),
+    }
 
 
 async def get_latest_subscription(
@@ -48,12 +82,7 @@ async def get_latest_subscription(
     user_id: UUID,
 ) -> Subscription | None:
     """Get the most recent subscription for a user."""
-    result = await db.execute(
-        select(Subscription)
-        .where(Subscription.user_id == user_id)
-        .order_by(desc(Subscription.created_at))
-        .limit(1)
-    )
+    result = await db.execute(_LATEST_SUBSCRIPTION, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 
@@ -70,23 +99,67 @@ async def upsert_subscription(
     current_period_end: datetime | None,
     metadata: dict | None,
 ) -> Subscription:
-    """Create or update the latest subscription for a user."""
-    subscription = await get_latest_subscription(db, user_id)
-    if subscription:
-        subscription.provider = provider
-        subscription.provider_subscription_id = provider_subscription_id
-        subscription.status = status
-        subscription.plan_name = plan_name
-        subscription.monthly_credits = monthly_credits
-        subscription.current_period_start = current_period_start
-        subscription.current_period_end = current_period_end
-        subscription.metadata_ = metadata
-        db.add(subscription)
-        await db.flush()
-        await db.refresh(subscription)
-        return subscription
-
-    subscription = Subscription(
+    """Create or update the user's subscription with INSERT ... ON CONFLICT (user_id)."""
+    values = {
+        Subscription.provider: provider,
+        Subscription.provider_subscription_id: provider_subscription_id,
+        Subscription.status: status,
+        Subscription.plan_name: plan_name,
+        Subscription.monthly_credits: monthly_credits,
+        Subscription.current_period_start: current_period_start,
+        Subscription.current_period_end: current_period_end,
+        Subscription.metadata_: metadata,
+    }
+    stmt = (
+        pg_insert(Subscription)
+        .values({Subscription.user_id: user_id, **values})
+        .on_conflict_do_update(
+            index_elements=[Subscription.user_id],
+            set_={**values, Subscription.updated_at: func.now()},
+        )
+        .returning(Subscription)
+        # An already loaded subscription takes the upserted values
+        .execution_options(populate_existing=True)
+    )
+    return (await db.scalars(stmt)).one()
+
+
+async def record_subscription_event(
+    db: AsyncSession,
+    *,
+    user_id: UUID,
+    provider: str,
+    provider_subscription_id: str | None,
+    status: str,
+    plan_name: str | None,
+    monthly_credits: int,
+    current_period_start: datetime | None,
+    current_period_end: datetime | None,
+    external_id: str,
+    amount_minor: int | None,
+    currency: str | None,
+    metadata: dict | None,
+) -> bool:
+    """Record the payment, then upsert the subscription and reset monthly credits.
+
+    The payment is inserted first with ON CONFLICT DO NOTHING, so a redelivered
+    event changes nothing; returns True when the event was applied.
+    """
+    if not await create_transaction_if_new(
+        db,
+        user_id=user_id,
+        provider=provider,
+        external_id=external_id,
+        kind="subscription",
+        status="completed",
+        amount_minor=amount_minor,
+        currency=currency,
+        credits_granted=monthly_credits,
+        metadata=metadata,
+    ):
+        return False
+    await upsert_subscription(
+        db,
         user_id=user_id,
         provider=provider,
         provider_subscription_id=provider_subscription_id,
@@ -95,17 +168,61 @@ async def upsert_subscription(
         monthly_credits=monthly_credits,
         current_period_start=current_period_start,
         current_period_end=current_period_end,
-        metadata_=metadata,
+        metadata=metadata,
+    )
+    await set_monthly_remaining(db, user_id=user_id, credits=monthly_credits)
+    return True
+
+
+async def record_monthly_usage(
+    db: AsyncSession,
+    *,
+    user_id: UUID,
+    model_name: str | None,
+    prompt_tokens: int | None,
+    completion_tokens: int | None,
+    total_tokens: int,
+    cost_credits: int,
+    provider_request_id: str | None,
+    metadata: dict | None,
+) -> TokenLedger | None:
+    """Record usage that the monthly allowance covers, in one statement.
+
+    The wallet UPDATE only matches when ``monthly_remaining`` covers the cost,
+    and the ledger row is inserted from its result. Returns None when nothing
+    matched, so the caller can fall back to ``record_usage``.
+    """
+    wallet_update = (
+        update(CreditWallet)
+        .where(CreditWallet.user_id == user_id, CreditWallet.monthly_remaining >= cost_credits)
+        .values(monthly_remaining=CreditWallet.monthly_remaining - cost_credits)
+        .returning(CreditWallet.user_id)
+        .cte("wallet_update")
+    )
+    entry = {
+        "model_name": model_name,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+        "cost_credits": cost_credits,
+        "overage_credits": 0,
+        "provider_request_id": provider_request_id,
+        "metadata": metadata,
+    }
+    rows = select(
+        wallet_update.c.user_id,
+        *(literal(value, _ledger[name].type) for name, value in entry.items()),
     )
-    db.add(subscription)
-    await db.flush()
-    await db.refresh(subscription)
-    return subscription
+    stmt = insert(TokenLedger).from_select(["user_id", *entry], rows).returning(TokenLedger)
+    return (await db.scalars(stmt)).one_or_none()
 
 
-async def create_ledger_entry(
+async def record_usage(
     db: AsyncSession,
     *,
+    wallet: CreditWallet,
+    monthly_deducted: int,
+    prepaid_deducted: int,
     user_id: UUID,
     model_name: str | None,
     prompt_tokens: int | None,
@@ -116,21 +233,39 @@ async def create_ledger_entry(
     provider_request_id: str | None,
     metadata: dict | None,
 ) -> TokenLedger:
-    """Create a token usage ledger entry."""
-    entry = TokenLedger(
-        user_id=user_id,
-        model_name=model_name,
-        prompt_tokens=prompt_tokens,
-        completion_tokens=completion_tokens,
-        total_tokens=total_tokens,
-        cost_credits=cost_credits,
-        overage_credits=overage_credits,
-        provider_request_id=provider_request_id,
-        metadata_=metadata,
-    )
-    db.add(entry)
-    await db.flush()
-    await db.refresh(entry)
+    """Deduct wallet credits and insert the ledger entry in one statement.
+
+    The wallet UPDATE runs as a data-modifying CTE attached to the ledger
+    INSERT, so both writes share a single round-trip.
+    """
+    wallet_update = (
+        update(CreditWallet)
+        .where(CreditWallet.id == wallet.id)
+        .values(_deduction_values(monthly_deducted, prepaid_deducted))
+        .cte("wallet_update")
+    )
+    stmt = (
+        insert(TokenLedger)
+        .values(
+            user_id=user_id,
+            model_name=model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cost_credits=cost_credits,
+            overage_credits=overage_credits,
+            provider_request_id=provider_request_id,
+            metadata_=metadata,
+        )
+        .add_cte(wallet_update)
+        .returning(TokenLedger)
+    )
+    entry = (await db.scalars(stmt)).one()
+    # Keep the loaded wallet in step without marking it dirty
+    monthly_remaining = max(wallet.monthly_remaining - monthly_deducted, 0)
+    prepaid_balance = max(wallet.prepaid_balance - prepaid_deducted, 0)
+    set_committed_value(wallet, "monthly_remaining", monthly_remaining)
+    set_committed_value(wallet, "prepaid_balance", prepaid_balance)
     return entry
 
 
@@ -139,29 +274,13 @@ async def list_ledger_entries(
     *,
     user_id: UUID,
     limit: int = 20,
-) -> list[TokenLedger]:
-    """List recent ledger entries for a user."""
-    result = await db.execute(
-        select(TokenLedger)
-        .where(TokenLedger.user_id == user_id)
-        .order_by(desc(TokenLedger.created_at))
-        .limit(limit)
-    )
-    return list(result.scalars().all())
+) -> list[RowMapping]:
+    """List recent ledger entries for a user as mappings of their summary columns."""
+    result = await db.execute(_RECENT_LEDGER, {"user_id": user_id, "limit": limit})
+    return list(result.mappings().all())
 
 
-async def get_transaction_by_external_id(
-    db: AsyncSession,
-    external_id: str,
-) -> PaymentTransaction | None:
-    """Get payment transaction by external ID."""
-    result = await db.execute(
-        select(PaymentTransaction).where(PaymentTransaction.external_id == external_id)
-    )
-    return result.scalar_one_or_none()
-
-
-async def create_transaction(
+async def create_transaction_if_new(
     db: AsyncSession,
     *,
     user_id: UUID,
@@ -169,70 +288,218 @@ async def create_transaction(
     external_id: str,
     kind: str,
     status: str,
-    amount: float | None,
+    amount_minor: int | None,
     currency: str | None,
     credits_granted: int,
     metadata: dict | None,
-) -> PaymentTransaction:
-    """Create a payment transaction entry."""
-    transaction = PaymentTransaction(
-        user_id=user_id,
-        provider=provider,
-        external_id=external_id,
-        kind=kind,
-        status=status,
-        amount=amount,
-        currency=currency,
-        credits_granted=credits_granted,
-        metadata_=metadata,
+) -> bool:
+    """Insert a payment transaction unless its external ID is already recorded.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING; returns True when a row was inserted.
+    """
+    stmt = (
+        pg_insert(PaymentTransaction)
+        .values(
+            user_id=user_id,
+            provider=provider,
+            external_id=external_id,
+            kind=kind,
+            status=status,
+            amount_minor=amount_minor,
+            currency=currency,
+            credits_granted=credits_granted,
+            metadata_=metadata,
+        )
+        .on_conflict_do_nothing(index_elements=[PaymentTransaction.external_id])
+        .returning(PaymentTransaction.id)
+    )
+    result = await db.execute(stmt)
+    return result.first() is not None
+
+
+async def add_prepaid_credits(db: AsyncSession, *, user_id: UUID, credits: int) -> None:
+    """Atomically add prepaid credits, creating the wallet if it does not exist."""
+    stmt = pg_insert(CreditWallet).values(
+        user_id=user_id, monthly_remaining=0, prepaid_balance=credits
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CreditWallet.user_id],
+            set_={
+                "prepaid_balance": CreditWallet.prepaid_balance + stmt.excluded.prepaid_balance,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+async def set_monthly_remaining(db: AsyncSession, *, user_id: UUID, credits: int) -> None:
+    """Atomically reset the monthly allowance, creating the wallet if it does not exist."""
+    stmt = pg_insert(CreditWallet).values(
+        user_id=user_id, monthly_remaining=credits, prepaid_balance=0
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CreditWallet.user_id],
+            set_={"monthly_remaining": stmt.excluded.monthly_remaining, "updated_at": func.now()},
+        )
+    )
+
+
+async def bulk_set_monthly_remaining(
+    db: AsyncSession,
+    *,
+    user_ids: Sequence[UUID],
+    credits: int,
+) -> None:
+    """Reset the monthly allowance for many users with one multi-row upsert."""
+    if not user_ids:
+        return
+    stmt = pg_insert(CreditWallet).values(
+        [
+            {"user_id": user_id, "monthly_remaining": credits, "prepaid_balance": 0}
+            for user_id in user_ids
+        ]
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CreditWallet.user_id],
+            set_={"monthly_remaining": stmt.excluded.monthly_remaining, "updated_at": func.now()},
+        )
+    )
+
+
+async def bulk_upsert_subscriptions(
+    db: AsyncSession,
+    *,
+    user_ids: Sequence[UUID],
+    provider: str,
+    status: str,
+    monthly_credits: int,
+    current_period_start: datetime | None,
+    current_period_end: datetime | None,
+) -> None:
+    """Create or update many users' subscriptions with one multi-row upsert.
+
+    Plan name, provider subscription ID and metadata are per-user, so existing
+    rows keep their stored values for them.
+    """
+    if not user_ids:
+        return
+    values = {
+        "provider": provider,
+        "status": status,
+        "monthly_credits": monthly_credits,
+        "current_period_start": current_period_start,
+        "current_period_end": current_period_end,
+    }
+    stmt = pg_insert(Subscription).values([{"user_id": user_id, **values} for user_id in user_ids])
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Subscription.user_id],
+            set_={**{name: stmt.excluded[name] for name in values}, "updated_at": func.now()},
+        )
     )
-    db.add(transaction)
-    await db.flush()
-    await db.refresh(transaction)
-    return transaction
 
 {%- elif cookiecutter.enable_billing and cookiecutter.use_sqlite and cookiecutter.use_sqlalchemy %}
 """Billing repository (SQLite sync)."""
 
+from collections.abc import Sequence
 from datetime import datetime
 
-from sqlalchemy import desc, select
+from sqlalchemy import RowMapping, bindparam, desc, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.models.billing import CreditWallet, PaymentTransaction, Subscription, TokenLedger
 
+# Hot read queries are built once; values are supplied as bind parameters
+_WALLET_BY_USER = select(CreditWallet).where(CreditWallet.user_id == bindparam("user_id"))
+_LATEST_SUBSCRIPTION = (
+    select(Subscription)
+    .where(Subscription.user_id == bindparam("user_id"))
+    .order_by(desc(Subscription.created_at))
+    .limit(1)
+)
+# Core select of the serialized columns only: no ORM instances are built and
+# the per-row metadata JSON is never decoded
+_ledger = TokenLedger.__table__.c
+_RECENT_LEDGER = (
+    select(
+        _ledger.id,
+        _ledger.model_name,
+        _ledger.prompt_tokens,
+        _ledger.completion_tokens,
+        _ledger.total_tokens,
+        _ledger.cost_credits,
+        _ledger.overage_credits,
+        _ledger.created_at,
+        _ledger.updated_at,
+    )
+    .where(_ledger.user_id == bindparam("user_id"))
+    .order_by(desc(_ledger.created_at))
+    .limit(bindparam("limit"))
+)
+
 
 def get_wallet_by_user_id(db: Session, user_id: str) -> CreditWallet | None:
     """Get wallet by user ID."""
-    result = db.execute(select(CreditWallet).where(CreditWallet.user_id == user_id))
+    result = db.execute(_WALLET_BY_USER, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 
-def create_wallet(
-    db: Session,
-    *,
-    user_id: str,
-    monthly_remaining: int = 0,
-    prepaid_balance: int = 0,
-) -> CreditWallet:
-    """Create a wallet for a user."""
-    wallet = CreditWallet(
-        user_id=user_id,
-        monthly_remaining=monthly_remaining,
-        prepaid_balance=prepaid_balance,
+def get_or_create_wallet(db: Session, user_id: str) -> CreditWallet:
+    """Get the user's wallet, creating it if missing.
+
+    Reads first, so an existing wallet costs one SELECT and no row write. A
+    missing one is inserted with ON CONFLICT DO NOTHING; if a concurrent
+    request created it first, its row is read back instead.
+    """
+    wallet = get_wallet_by_user_id(db, user_id)
+    if wallet is not None:
+        return wallet
+    stmt = (
+        sqlite_insert(CreditWallet)
+        .values(user_id=user_id, monthly_remaining=0, prepaid_balance=0)
+        .on_conflict_do_nothing(index_elements=[CreditWallet.user_id])
+        .returning(CreditWallet)
     )
-    db.add(wallet)
-    db.flush()
-    db.refresh(wallet)
+    wallet = db.scalars(stmt).one_or_none()
+    if wallet is None:
+        wallet = db.execute(_WALLET_BY_USER, {"user_id": user_id}).scalar_one()
     return wallet
 
 
-def update_wallet(db: Session, wallet: CreditWallet) -> CreditWallet:
-    """Persist wallet changes."""
-    db.add(wallet)
-    db.flush()
-    db.refresh(wallet)
-    return wallet
+def _deduction_values(monthly: int, prepaid: int) -> dict:
+    """SET clauses for a credit deduction that never drive a balance negative."""
+    return {
+        "monthly_remaining": func.max(CreditWallet.monthly_remaining - monthly, 0),
+        "prepaid_balance": func.max(CreditWallet.prepaid_balance - prepaid, 0),
+    }
+
+
+def deduct_credits(
+    db: Session,
+    *,
+    user_id: str,
+    monthly: int,
+    prepaid: int,
+) -> tuple[int, int]:
+    """Atomically deduct credits and return the new (monthly, prepaid) balances.
+
+    The guard keeps balances at zero if a concurrent request spent the credits
+    after they were read.
+    """
+    stmt = (
+        update(CreditWallet)
+        .where(CreditWallet.user_id == user_id)
+        .values(_deduction_values(monthly, prepaid))
+        .returning(CreditWallet.monthly_remaining, CreditWallet.prepaid_balance)
+        .execution_options(synchronize_session=False)
+    )
+    monthly_remaining, prepaid_balance = db.execute(stmt).one()
+    return monthly_remaining, prepaid_balance
 
 
 def get_latest_subscription(
@@ -240,12 +507,7 @@ def get_latest_subscription(
     user_id: str,
 ) -> Subscription | None:
     """Get the most recent subscription for a user."""
-    result = db.execute(
-        select(Subscription)
-        .where(Subscription.user_id == user_id)
-        .order_by(desc(Subscription.created_at))
-        .limit(1)
-    )
+    result = db.execute(_LATEST_SUBSCRIPTION, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 
@@ -262,23 +524,67 @@ def upsert_subscription(
     current_period_end: datetime | None,
     metadata: dict | None,
 ) -> Subscription:
-    """Create or update the latest subscription for a user."""
-    subscription = get_latest_subscription(db, user_id)
-    if subscription:
-        subscription.provider = provider
-        subscription.provider_subscription_id = provider_subscription_id
-        subscription.status = status
-        subscription.plan_name = plan_name
-        subscription.monthly_credits = monthly_credits
-        subscription.current_period_start = current_period_start
-        subscription.current_period_end = current_period_end
-        subscription.metadata_ = metadata
-        db.add(subscription)
-        db.flush()
-        db.refresh(subscription)
-        return subscription
-
-    subscription = Subscription(
+    """Create or update the user's subscription with INSERT ... ON CONFLICT (user_id)."""
+    values = {
+        Subscription.provider: provider,
+        Subscription.provider_subscription_id: provider_subscription_id,
+        Subscription.status: status,
+        Subscription.plan_name: plan_name,
+        Subscription.monthly_credits: monthly_credits,
+        Subscription.current_period_start: current_period_start,
+        Subscription.current_period_end: current_period_end,
+        Subscription.metadata_: metadata,
+    }
+    stmt = (
+        sqlite_insert(Subscription)
+        .values({Subscription.user_id: user_id, **values})
+        .on_conflict_do_update(
+            index_elements=[Subscription.user_id],
+            set_={**values, Subscription.updated_at: func.now()},
+        )
+        .returning(Subscription)
+        # An already loaded subscription takes the upserted values
+        .execution_options(populate_existing=True)
+    )
+    return db.scalars(stmt).one()
+
+
+def record_subscription_event(
+    db: Session,
+    *,
+    user_id: str,
+    provider: str,
+    provider_subscription_id: str | None,
+    status: str,
+    plan_name: str | None,
+    monthly_credits: int,
+    current_period_start: datetime | None,
+    current_period_end: datetime | None,
+    external_id: str,
+    amount_minor: int | None,
+    currency: str | None,
+    metadata: dict | None,
+) -> bool:
+    """Record the payment, then upsert the subscription and reset monthly credits.
+
+    The payment is inserted first with ON CONFLICT DO NOTHING, so a redelivered
+    event changes nothing; returns True when the event was applied.
+    """
+    if not create_transaction_if_new(
+        db,
+        user_id=user_id,
+        provider=provider,
+        external_id=external_id,
+        kind="subscription",
+        status="completed",
+        amount_minor=amount_minor,
+        currency=currency,
+        credits_granted=monthly_credits,
+        metadata=metadata,
+    ):
+        return False
+    upsert_subscription(
+        db,
         user_id=user_id,
         provider=provider,
         provider_subscription_id=provider_subscription_id,
@@ -287,15 +593,13 @@ def upsert_subscription(
         monthly_credits=monthly_credits,
         current_period_start=current_period_start,
         current_period_end=current_period_end,
-        metadata_=metadata,
+        metadata=metadata,
     )
-    db.add(subscription)
-    db.flush()
-    db.refresh(subscription)
-    return subscription
+    set_monthly_remaining(db, user_id=user_id, credits=monthly_credits)
+    return True
 
 
-def create_ledger_entry(
+def record_monthly_usage(
     db: Session,
     *,
     user_id: str,
@@ -304,56 +608,93 @@ def create_ledger_entry(
     completion_tokens: int | None,
     total_tokens: int,
     cost_credits: int,
-    overage_credits: int,
     provider_request_id: str | None,
     metadata: dict | None,
-) -> TokenLedger:
-    """Create a token usage ledger entry."""
-    entry = TokenLedger(
-        user_id=user_id,
-        model_name=model_name,
-        prompt_tokens=prompt_tokens,
-        completion_tokens=completion_tokens,
-        total_tokens=total_tokens,
-        cost_credits=cost_credits,
-        overage_credits=overage_credits,
-        provider_request_id=provider_request_id,
-        metadata_=metadata,
-    )
-    db.add(entry)
-    db.flush()
-    db.refresh(entry)
-    return entry
+) -> TokenLedger | None:
+    """Record usage that the monthly allowance covers, without reading the wallet.
+
+    The wallet UPDATE only matches when ``monthly_remaining`` covers the cost.
+    Returns None when nothing matched, so the caller can fall back to
+    ``record_usage``.
+    """
+    result = db.execute(
+        update(CreditWallet)
+        .where(CreditWallet.user_id == user_id, CreditWallet.monthly_remaining >= cost_credits)
+        .values(monthly_remaining=CreditWallet.monthly_remaining - cost_credits)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return None
+    stmt = (
+        insert(TokenLedger)
+        .values(
+            user_id=user_id,
+            model_name=model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cost_credits=cost_credits,
+            overage_credits=0,
+            provider_request_id=provider_request_id,
+            metadata_=metadata,
+        )
+        .returning(TokenLedger)
+    )
+    return db.scalars(stmt).one()
 
 
-def list_ledger_entries(
+def record_usage(
     db: Session,
     *,
+    wallet: CreditWallet,
+    monthly_deducted: int,
+    prepaid_deducted: int,
     user_id: str,
-    limit: int = 20,
-) -> list[TokenLedger]:
-    """List recent ledger entries for a user."""
-    result = db.execute(
-        select(TokenLedger)
-        .where(TokenLedger.user_id == user_id)
-        .order_by(desc(TokenLedger.created_at))
-        .limit(limit)
+    model_name: str | None,
+    prompt_tokens: int | None,
+    completion_tokens: int | None,
+    total_tokens: int,
+    cost_credits: int,
+    overage_credits: int,
+    provider_request_id: str | None,
+    metadata: dict | None,
+) -> TokenLedger:
+    """Deduct wallet credits and insert the ledger entry without ORM refreshes."""
+    monthly_remaining, prepaid_balance = deduct_credits(
+        db, user_id=user_id, monthly=monthly_deducted, prepaid=prepaid_deducted
+    )
+    set_committed_value(wallet, "monthly_remaining", monthly_remaining)
+    set_committed_value(wallet, "prepaid_balance", prepaid_balance)
+    stmt = (
+        insert(TokenLedger)
+        .values(
+            user_id=user_id,
+            model_name=model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cost_credits=cost_credits,
+            overage_credits=overage_credits,
+            provider_request_id=provider_request_id,
+            metadata_=metadata,
+        )
+        .returning(TokenLedger)
     )
-    return list(result.scalars().all())
+    return db.scalars(stmt).one()
 
 
-def get_transaction_by_external_id(
+def list_ledger_entries(
     db: Session,
-    external_id: str,
-) -> PaymentTransaction | None:
-    """Get payment transaction by external ID."""
-    result = db.execute(
-        select(PaymentTransaction).where(PaymentTransaction.external_id == external_id)
-    )
-    return result.scalar_one_or_none()
+    *,
+    user_id: str,
+    limit: int = 20,
+) -> list[RowMapping]:
+    """List recent ledger entries for a user as mappings of their summary columns."""
+    result = db.execute(_RECENT_LEDGER, {"user_id": user_id, "limit": limit})
+    return list(result.mappings().all())
 
 
-def create_transaction(
+def create_transaction_if_new(
     db: Session,
     *,
     user_id: str,
@@ -361,27 +702,120 @@ def create_transaction(
     external_id: str,
     kind: str,
     status: str,
-    amount: float | None,
+    amount_minor: int | None,
     currency: str | None,
     credits_granted: int,
     metadata: dict | None,
-) -> PaymentTransaction:
-    """Create a payment transaction entry."""
-    transaction = PaymentTransaction(
-        user_id=user_id,
-        provider=provider,
-        external_id=external_id,
-        kind=kind,
-        status=status,
-        amount=amount,
-        currency=currency,
-        credits_granted=credits_granted,
-        metadata_=metadata,
+) -> bool:
+    """Insert a payment transaction unless its external ID is already recorded.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING; returns True when a row was inserted.
+    """
+    stmt = (
+        sqlite_insert(PaymentTransaction)
+        .values(
+            user_id=user_id,
+            provider=provider,
+            external_id=external_id,
+            kind=kind,
+            status=status,
+            amount_minor=amount_minor,
+            currency=currency,
+            credits_granted=credits_granted,
+            metadata_=metadata,
+        )
+        .on_conflict_do_nothing(index_elements=[PaymentTransaction.external_id])
+        .returning(PaymentTransaction.id)
+    )
+    result = db.execute(stmt)
+    return result.first() is not None
+
+
+def add_prepaid_credits(db: Session, *, user_id: str, credits: int) -> None:
+    """Atomically add prepaid credits, creating the wallet if it does not exist."""
+    stmt = sqlite_insert(CreditWallet).values(
+        user_id=user_id, monthly_remaining=0, prepaid_balance=credits
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CreditWallet.user_id],
+            set_={
+                "prepaid_balance": CreditWallet.prepaid_balance + stmt.excluded.prepaid_balance,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+def set_monthly_remaining(db: Session, *, user_id: str, credits: int) -> None:
+    """Atomically reset the monthly allowance, creating the wallet if it does not exist."""
+    stmt = sqlite_insert(CreditWallet).values(
+        user_id=user_id, monthly_remaining=credits, prepaid_balance=0
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CreditWallet.user_id],
+            set_={"monthly_remaining": stmt.excluded.monthly_remaining, "updated_at": func.now()},
+        )
+    )
+
+
+def bulk_set_monthly_remaining(
+    db: Session,
+    *,
+    user_ids: Sequence[str],
+    credits: int,
+) -> None:
+    """Reset the monthly allowance for many users with one multi-row upsert."""
+    if not user_ids:
+        return
+    stmt = sqlite_insert(CreditWallet).values(
+        [
+            {"user_id": user_id, "monthly_remaining": credits, "prepaid_balance": 0}
+            for user_id in user_ids
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CreditWallet.user_id],
+            set_={"monthly_remaining": stmt.excluded.monthly_remaining, "updated_at": func.now()},
+        )
+    )
+
+
+def bulk_upsert_subscriptions(
+    db: Session,
+    *,
+    user_ids: Sequence[str],
+    provider: str,
+    status: str,
+    monthly_credits: int,
+    current_period_start: datetime | None,
+    current_period_end: datetime | None,
+) -> None:
+    """Create or update many users' subscriptions with one multi-row upsert.
+
+    Plan name, provider subscription ID and metadata are per-user, so existing
+    rows keep their stored values for them.
+    """
+    if not user_ids:
+        return
+    values = {
+        "provider": provider,
+        "status": status,
+        "monthly_credits": monthly_credits,
+        "current_period_start": current_period_start,
+        "current_period_end": current_period_end,
+    }
+    stmt = sqlite_insert(Subscription).values(
+        [{"user_id": user_id, **values} for user_id in user_ids]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Subscription.user_id],
+            set_={**{name: stmt.excluded[name] for name in values}, "updated_at": func.now()},
+        )
     )
-    db.add(transaction)
-    db.flush()
-    db.refresh(transaction)
-    return transaction
 
 {%- else %}
 """Billing repository - not configured."""
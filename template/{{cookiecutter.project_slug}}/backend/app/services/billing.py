@@ -3,42 +3,107 @@
 
 from __future__ import annotations
 
-import math
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping, Sequence
 from datetime import datetime
+from fractions import Fraction
+from types import MappingProxyType
+from typing import Any, TypeVar
 from uuid import UUID
 
+from sqlalchemy import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.billing.providers import creem
-from app.core.config import settings
+{%- if cookiecutter.enable_redis %}
+from app.clients.redis import RedisClient
+{%- endif %}
+from app.core.config import CreditPackConfig, settings
 from app.core.exceptions import BadRequestError, PaymentRequiredError
 from app.db.models.billing import CreditWallet, Subscription, TokenLedger
+from app.db.session import get_db_context
 from app.repositories import billing_repo
 
+# Concurrent payment webhooks share one commit (see WebhookBatcher)
+WEBHOOK_BATCH_SIZE = 50
+WEBHOOK_FLUSH_INTERVAL = 0.1
+
+T = TypeVar("T")
+_WebhookJob = tuple[Callable[[AsyncSession], Awaitable[Any]], asyncio.Future[Any]]
+{%- if cookiecutter.enable_redis %}
+
+# precheck reads available credits (monthly + prepaid) from Redis. The value is
+# tagged with the user's cache generation; writers bump the generation once
+# their transaction has committed, which retires every value cached before it
+WALLET_CACHE_TTL = 300
+# Outlives any value tagged with the generation, so an expired counter that
+# restarts from zero cannot match an old value again
+WALLET_GENERATION_TTL = 2 * WALLET_CACHE_TTL
+
+
+def _available_credits_key(user_id: UUID) -> str:
+    return f"wallet:avail:{user_id}"
+
+
+def _credits_generation_key(user_id: UUID) -> str:
+    return f"wallet:gen:{user_id}"
+
+
+async def invalidate_available_credits(redis: RedisClient, *user_ids: UUID) -> None:
+    """Retire the cached available credits; call after the wallet change commits.
+
+    Bumping the generation, rather than deleting the value, also retires a
+    balance that a concurrent precheck read before the commit and stores after.
+    """
+    async with redis.raw.pipeline(transaction=False) as pipe:
+        for user_id in user_ids:
+            pipe.incr(_credits_generation_key(user_id))
+            pipe.expire(_credits_generation_key(user_id), WALLET_GENERATION_TTL)
+        await pipe.execute()
+{%- endif %}
+
 
 def estimate_tokens_from_text(text: str) -> int:
     """Rough token estimation based on character count."""
     if not text:
         return 0
     chars_per_token = max(settings.BILLING_CHARS_PER_TOKEN, 1)
-    return max(1, math.ceil(len(text) / chars_per_token))
+    return -(-len(text) // chars_per_token)
 
 
 def estimate_prompt_tokens(history: list[dict[str, str]], user_message: str) -> int:
     """Estimate prompt tokens using history + current message."""
-    total_chars = sum(len(msg.get("content", "")) for msg in history) + len(user_message)
+    # List comprehensions are inlined (PEP 709), avoiding a generator frame per message
+    total_chars = sum([len(msg.get("content", "")) for msg in history]) + len(user_message)
     if total_chars <= 0:
         return 0
     chars_per_token = max(settings.BILLING_CHARS_PER_TOKEN, 1)
-    return max(1, math.ceil(total_chars / chars_per_token))
+    return -(-total_chars // chars_per_token)
+
+
+# Multipliers are fixed at settings load, so they are converted once
+_MODEL_MULTIPLIERS: Mapping[str, float] = MappingProxyType(
+    {name: float(value) for name, value in settings.BILLING_MODEL_MULTIPLIERS.items()}
+)
+_DEFAULT_MULTIPLIER = _MODEL_MULTIPLIERS.get("default", 1.0)
+
+
+def _as_ratio(value: float) -> tuple[int, int]:
+    # str() gives the shortest decimal for the float, which Fraction keeps exactly
+    ratio = Fraction(str(value))
+    return ratio.numerator, ratio.denominator
 
 
-def get_model_multiplier(model_name: str | None) -> float:
-    """Get the billing multiplier for a model."""
-    multipliers = settings.BILLING_MODEL_MULTIPLIERS
-    if model_name and model_name in multipliers:
-        return float(multipliers[model_name])
-    return float(multipliers.get("default", 1.0))
+# Exact (numerator, denominator) multipliers keep cost rounding in integer maths
+_MODEL_MULTIPLIER_RATIOS: Mapping[str, tuple[int, int]] = MappingProxyType(
+    {name: _as_ratio(value) for name, value in _MODEL_MULTIPLIERS.items()}
+)
+_DEFAULT_MULTIPLIER_RATIO = _as_ratio(_DEFAULT_MULTIPLIER)
+
+# Reversed so the first configured pack wins, as with a linear scan
+_PACKS_BY_CREDITS: Mapping[int, CreditPackConfig] = MappingProxyType(
+    {pack.credits: pack for pack in reversed(settings.BILLING_CREDIT_PACKS)}
+)
 
 
 def calculate_cost_credits(total_tokens: int, model_name: str | None) -> int:
@@ -46,40 +111,63 @@ def calculate_cost_credits(total_tokens: int, model_name: str | None) -> int:
     if total_tokens <= 0:
         return 0
     tokens_per_credit = max(settings.BILLING_TOKENS_PER_CREDIT, 1)
-    multiplier = get_model_multiplier(model_name)
-    return math.ceil((total_tokens / tokens_per_credit) * multiplier)
+    numerator, denominator = (
+        _MODEL_MULTIPLIER_RATIOS.get(model_name, _DEFAULT_MULTIPLIER_RATIO)
+        if model_name
+        else _DEFAULT_MULTIPLIER_RATIO
+    )
+    # Ceiling of total_tokens * multiplier / tokens_per_credit
+    return -(-total_tokens * numerator // (tokens_per_credit * denominator))
 
 
 class BillingService:
     """Service for billing, credits, and usage tracking."""
 
+{%- if cookiecutter.enable_redis %}
+
+    def __init__(self, db: AsyncSession, redis: RedisClient | None = None):
+        self.db = db
+        self.redis = redis
+{%- else %}
+
     def __init__(self, db: AsyncSession):
         self.db = db
+{%- endif %}
 
     async def get_wallet(self, user_id: UUID) -> CreditWallet:
         """Fetch or create a wallet for the user."""
-        wallet = await billing_repo.get_wallet_by_user_id(self.db, user_id)
-        if not wallet:
-            wallet = await billing_repo.create_wallet(self.db, user_id=user_id)
-        return wallet
+        return await billing_repo.get_or_create_wallet(self.db, user_id)
 
     async def get_subscription(self, user_id: UUID) -> Subscription | None:
         """Get latest subscription for a user."""
         return await billing_repo.get_latest_subscription(self.db, user_id)
 
-    async def list_ledger(self, user_id: UUID, limit: int = 20) -> list[TokenLedger]:
+    async def list_ledger(self, user_id: UUID, limit: int = 20) -> list[RowMapping]:
         """List recent token ledger entries."""
         return await billing_repo.list_ledger_entries(self.db, user_id=user_id, limit=limit)
 
-    def get_credit_packs(self) -> list[dict]:
+    async def get_summary(
+        self, user_id: UUID, ledger_limit: int = 20
+    ) -> tuple[CreditWallet, Subscription | None, list[RowMapping]]:
+        """Load wallet, latest subscription and recent ledger.
+
+        The queries run one after another on the request session: spreading
+        them over extra sessions would hold several pool connections per
+        request for little gain.
+        """
+        wallet = await self.get_wallet(user_id)
+        subscription = await self.get_subscription(user_id)
+        ledger = await self.list_ledger(user_id, limit=ledger_limit)
+        return wallet, subscription, ledger
+
+    def get_credit_packs(self) -> list[CreditPackConfig]:
         """Return configured credit packs."""
         return settings.BILLING_CREDIT_PACKS
 
     async def precheck(self, user_id: UUID, model_name: str | None, estimated_tokens: int) -> int:
         """Ensure user has enough credits for estimated usage."""
-        wallet = await self.get_wallet(user_id)
         cost = calculate_cost_credits(estimated_tokens, model_name)
-        available = wallet.monthly_remaining + wallet.prepaid_balance
+        available = await self.get_available_credits(user_id)
         if available < cost:
             raise PaymentRequiredError(
                 message="Insufficient credits for this request",
@@ -87,6 +175,31 @@ class BillingService:
             )
         return cost
 
+    async def get_available_credits(self, user_id: UUID) -> int:
+        """Get the monthly plus prepaid credits available to a user."""
+{%- if cookiecutter.enable_redis %}
+        if self.redis:
+            generation, cached = await self.redis.raw.mget(
+                _credits_generation_key(user_id), _available_credits_key(user_id)
+            )
+            generation = generation or "0"
+            if cached is not None:
+                cached_generation, _, value = cached.partition(":")
+                if cached_generation == generation:
+                    return int(value)
+{%- endif %}
+        wallet = await self.get_wallet(user_id)
+        available = wallet.monthly_remaining + wallet.prepaid_balance
+{%- if cookiecutter.enable_redis %}
+        if self.redis:
+            # Tagged with the generation read before the wallet: if a writer
+            # commits in between, the value never matches and is simply re-read
+            await self.redis.set(
+                _available_credits_key(user_id), f"{generation}:{available}", WALLET_CACHE_TTL
+            )
+{%- endif %}
+        return available
+
     async def commit_usage(
         self,
         *,
@@ -98,21 +211,40 @@ class BillingService:
         provider_request_id: str | None = None,
         metadata: dict | None = None,
     ) -> TokenLedger:
-        """Deduct credits and record token usage."""
-        wallet = await self.get_wallet(user_id)
+        """Deduct credits and record token usage.
+
+        Nothing is committed here, so the caller invalidates the cached
+        available credits once its transaction commits.
+        """
         cost = calculate_cost_credits(total_tokens, model_name)
 
+        # Fast path: the monthly allowance covers the cost (no wallet read)
+        entry = await billing_repo.record_monthly_usage(
+            self.db,
+            user_id=user_id,
+            model_name=model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cost_credits=cost,
+            provider_request_id=provider_request_id,
+            metadata=metadata,
+        )
+        if entry is not None:
+            return entry
+
+        wallet = await self.get_wallet(user_id)
+
         monthly_deducted = min(wallet.monthly_remaining, cost)
         remaining = cost - monthly_deducted
         prepaid_deducted = min(wallet.prepaid_balance, remaining)
         overage = cost - monthly_deducted - prepaid_deducted
 
-        wallet.monthly_remaining -= monthly_deducted
-        wallet.prepaid_balance -= prepaid_deducted
-        await billing_repo.update_wallet(self.db, wallet)
-
-        return await billing_repo.create_ledger_entry(
+        return await billing_repo.record_usage(
             self.db,
+            wallet=wallet,
+            monthly_deducted=monthly_deducted,
+            prepaid_deducted=prepaid_deducted,
             user_id=user_id,
             model_name=model_name,
             prompt_tokens=prompt_tokens,
@@ -124,24 +256,59 @@ class BillingService:
             metadata=metadata,
         )
 
-    async def grant_monthly_allowance(
+    async def grant_monthly_allowance_bulk(
+        self,
+        user_ids: Sequence[UUID],
+        *,
+        provider: str,
+        current_period_start: datetime | None = None,
+        current_period_end: datetime | None = None,
+    ) -> None:
+        """Renew many users at once (e.g. at cycle renewal).
+
+        Monthly credits are reset and subscriptions marked active with one
+        multi-row upsert each, instead of per-user statements. The session is
+        committed here so the users' cached available credits can be retired
+        once the new allowance is durable.
+        """
+        await billing_repo.bulk_set_monthly_remaining(
+            self.db, user_ids=user_ids, credits=settings.BILLING_MONTHLY_CREDITS
+        )
+        await billing_repo.bulk_upsert_subscriptions(
+            self.db,
+            user_ids=user_ids,
+            provider=provider,
+            status="active",
+            monthly_credits=settings.BILLING_MONTHLY_CREDITS,
+            current_period_start=current_period_start,
+            current_period_end=current_period_end,
+        )
+        await self.db.commit()
+{%- if cookiecutter.enable_redis %}
+        if self.redis and user_ids:
+            await invalidate_available_credits(self.redis, *user_ids)
+{%- endif %}
+
+    async def apply_subscription_event(
         self,
         *,
         user_id: UUID,
         provider: str,
+        external_id: str,
         provider_subscription_id: str | None,
         status: str,
         plan_name: str | None,
         current_period_start: datetime | None,
         current_period_end: datetime | None,
+        amount_minor: int | None,
+        currency: str | None,
         metadata: dict | None,
-    ) -> Subscription:
-        """Grant monthly credits and upsert subscription."""
-        wallet = await self.get_wallet(user_id)
-        wallet.monthly_remaining = settings.BILLING_MONTHLY_CREDITS
-        await billing_repo.update_wallet(self.db, wallet)
+    ) -> bool:
+        """Record the subscription payment and grant monthly credits, once per external ID.
 
-        return await billing_repo.upsert_subscription(
+        Returns False when the event was already recorded.
+        """
+        return await billing_repo.record_subscription_event(
             self.db,
             user_id=user_id,
             provider=provider,
@@ -151,6 +318,9 @@ class BillingService:
             monthly_credits=settings.BILLING_MONTHLY_CREDITS,
             current_period_start=current_period_start,
             current_period_end=current_period_end,
+            external_id=external_id,
+            amount_minor=amount_minor,
+            currency=currency,
             metadata=metadata,
         )
 
@@ -161,59 +331,31 @@ class BillingService:
         provider: str,
         external_id: str,
         credits: int,
-        amount: float | None,
+        amount_minor: int | None,
         currency: str | None,
         metadata: dict | None,
-    ) -> None:
-        """Add prepaid credits and record transaction."""
-        existing = await billing_repo.get_transaction_by_external_id(self.db, external_id)
-        if existing:
-            return
-
-        wallet = await self.get_wallet(user_id)
-        wallet.prepaid_balance += credits
-        await billing_repo.update_wallet(self.db, wallet)
+    ) -> bool:
+        """Record the transaction and add prepaid credits, once per external ID.
 
-        await billing_repo.create_transaction(
+        Returns False when the event was already recorded.
+        """
+        inserted = await billing_repo.create_transaction_if_new(
             self.db,
             user_id=user_id,
             provider=provider,
             external_id=external_id,
             kind="credit_pack",
             status="completed",
-            amount=amount,
+            amount_minor=amount_minor,
             currency=currency,
             credits_granted=credits,
             metadata=metadata,
         )
+        if not inserted:
+            return False
 
-    async def record_subscription_payment(
-        self,
-        *,
-        user_id: UUID,
-        provider: str,
-        external_id: str,
-        amount: float | None,
-        currency: str | None,
-        metadata: dict | None,
-    ) -> None:
-        """Record a subscription payment transaction."""
-        existing = await billing_repo.get_transaction_by_external_id(self.db, external_id)
-        if existing:
-            return
-
-        await billing_repo.create_transaction(
-            self.db,
-            user_id=user_id,
-            provider=provider,
-            external_id=external_id,
-            kind="subscription",
-            status="completed",
-            amount=amount,
-            currency=currency,
-            credits_granted=settings.BILLING_MONTHLY_CREDITS,
-            metadata=metadata,
-        )
+        await billing_repo.add_prepaid_credits(self.db, user_id=user_id, credits=credits)
+        return True
 
     async def create_checkout(
         self,
@@ -236,17 +378,10 @@ class BillingService:
         elif kind == "credit_pack":
             if pack_credits is None:
                 raise BadRequestError(message="pack_credits is required for credit_pack checkout")
-            pack = next(
-                (
-                    item
-                    for item in settings.BILLING_CREDIT_PACKS
-                    if int(item.get("credits", 0)) == int(pack_credits)
-                ),
-                None,
-            )
+            pack = _PACKS_BY_CREDITS.get(int(pack_credits))
             if not pack:
                 raise BadRequestError(message="Unknown credit pack selected")
-            product_id = pack.get("provider_product_id") or ""
+            product_id = pack.provider_product_id
             if not product_id:
                 raise BadRequestError(message="Credit pack product_id is not configured")
         else:
@@ -261,18 +396,148 @@ class BillingService:
         )
         return response["checkout_url"]
 
+
+class WebhookBatcher:
+    """Group commit for payment webhook writes.
+
+    Handlers submitted within ``flush_interval`` of each other (up to
+    ``batch_size``) run in one transaction, each inside its own SAVEPOINT so a
+    failing event rolls back alone. Submitters resume only after the shared
+    commit, so a webhook is never acknowledged before its writes are durable.
+
+    The queue and flusher task belong to the event loop that calls start()
+    (the application lifespan); stop() discards them, so a later lifespan can
+    start the batcher again.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = WEBHOOK_BATCH_SIZE,
+        flush_interval: float = WEBHOOK_FLUSH_INTERVAL,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # None is the shutdown sentinel
+        self._queue: asyncio.Queue[_WebhookJob | None] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether submitted handlers will be run."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._flusher(self._queue))
+
+    async def stop(self) -> None:
+        """Run queued handlers and stop the background flusher."""
+        if self._queue is None or self._task is None:
+            return
+        queue, task = self._queue, self._task
+        self._queue, self._task = None, None
+        if task.done():
+            # The flusher already failed every pending submitter with its error
+            if not task.cancelled():
+                task.exception()
+            return
+        queue.put_nowait(None)
+        await task
+
+    async def submit(self, handler: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        """Run ``handler`` in the next batch and return its result once committed."""
+        if self._queue is None or not self.running:
+            raise RuntimeError("Webhook batcher is not running")
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((handler, future))
+        return await future
+
+    async def _collect(
+        self, queue: asyncio.Queue[_WebhookJob | None], batch: list[_WebhookJob]
+    ) -> bool:
+        """Fill ``batch`` with up to batch_size jobs; returns whether to stop."""
+        first = await queue.get()
+        if first is None:
+            return True
+        batch.append(first)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                job = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                break
+            if job is None:
+                return True
+            batch.append(job)
+        return False
+
+    async def _flusher(self, queue: asyncio.Queue[_WebhookJob | None]) -> None:
+        batch: list[_WebhookJob] = []
+        try:
+            stopping = False
+            while not stopping:
+                batch = []
+                stopping = await self._collect(queue, batch)
+                if batch:
+                    await self._run(batch)
+        except BaseException as exc:
+            # Whatever ends the flusher, no submitter is left waiting forever
+            while not queue.empty():
+                if (job := queue.get_nowait()) is not None:
+                    batch.append(job)
+            for _, future in batch:
+                if not future.done():
+                    error = RuntimeError("Webhook batcher stopped before the event was committed")
+                    error.__cause__ = exc
+                    future.set_exception(error)
+            raise
+
+    async def _run(self, batch: list[_WebhookJob]) -> None:
+        outcomes: list[tuple[asyncio.Future[Any], Any, BaseException | None]] = []
+        try:
+            async with get_db_context() as db:
+                for handler, future in batch:
+                    try:
+                        async with db.begin_nested():
+                            outcomes.append((future, await handler(db), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+        except Exception as exc:
+            # The commit itself failed, so nothing in the batch was written
+            outcomes = [(future, None, exc) for _, future in batch]
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+
+webhook_batcher = WebhookBatcher()
+
 {%- elif cookiecutter.enable_billing and cookiecutter.use_sqlite and cookiecutter.use_sqlalchemy %}
 """Billing service (SQLite sync)."""
 
 from __future__ import annotations
 
-import math
+from collections.abc import Mapping, Sequence
 from datetime import datetime
+from fractions import Fraction
+from types import MappingProxyType
 
+from sqlalchemy import RowMapping
 from sqlalchemy.orm import Session
 
 from app.billing.providers import creem
-from app.core.config import settings
+from app.core.config import CreditPackConfig, settings
 from app.core.exceptions import BadRequestError, PaymentRequiredError
 from app.db.models.billing import CreditWallet, Subscription, TokenLedger
 from app.repositories import billing_repo
@@ -283,24 +548,42 @@ def estimate_tokens_from_text(text: str) -> int:
     if not text:
         return 0
     chars_per_token = max(settings.BILLING_CHARS_PER_TOKEN, 1)
-    return max(1, math.ceil(len(text) / chars_per_token))
+    return -(-len(text) // chars_per_token)
 
 
 def estimate_prompt_tokens(history: list[dict[str, str]], user_message: str) -> int:
     """Estimate prompt tokens using history + current message."""
-    total_chars = sum(len(msg.get("content", "")) for msg in history) + len(user_message)
+    # List comprehensions are inlined (PEP 709), avoiding a generator frame per message
+    total_chars = sum([len(msg.get("content", "")) for msg in history]) + len(user_message)
     if total_chars <= 0:
         return 0
     chars_per_token = max(settings.BILLING_CHARS_PER_TOKEN, 1)
-    return max(1, math.ceil(total_chars / chars_per_token))
+    return -(-total_chars // chars_per_token)
+
 
+# Multipliers are fixed at settings load, so they are converted once
+_MODEL_MULTIPLIERS: Mapping[str, float] = MappingProxyType(
+    {name: float(value) for name, value in settings.BILLING_MODEL_MULTIPLIERS.items()}
+)
+_DEFAULT_MULTIPLIER = _MODEL_MULTIPLIERS.get("default", 1.0)
 
-def get_model_multiplier(model_name: str | None) -> float:
-    """Get the billing multiplier for a model."""
-    multipliers = settings.BILLING_MODEL_MULTIPLIERS
-    if model_name and model_name in multipliers:
-        return float(multipliers[model_name])
-    return float(multipliers.get("default", 1.0))
+
+def _as_ratio(value: float) -> tuple[int, int]:
+    # str() gives the shortest decimal for the float, which Fraction keeps exactly
+    ratio = Fraction(str(value))
+    return ratio.numerator, ratio.denominator
+
+
+# Exact (numerator, denominator) multipliers keep cost rounding in integer maths
+_MODEL_MULTIPLIER_RATIOS: Mapping[str, tuple[int, int]] = MappingProxyType(
+    {name: _as_ratio(value) for name, value in _MODEL_MULTIPLIERS.items()}
+)
+_DEFAULT_MULTIPLIER_RATIO = _as_ratio(_DEFAULT_MULTIPLIER)
+
+# Reversed so the first configured pack wins, as with a linear scan
+_PACKS_BY_CREDITS: Mapping[int, CreditPackConfig] = MappingProxyType(
+    {pack.credits: pack for pack in reversed(settings.BILLING_CREDIT_PACKS)}
+)
 
 
 def calculate_cost_credits(total_tokens: int, model_name: str | None) -> int:
@@ -308,8 +591,13 @@ def calculate_cost_credits(total_tokens: int, model_name: str | None) -> int:
     if total_tokens <= 0:
         return 0
     tokens_per_credit = max(settings.BILLING_TOKENS_PER_CREDIT, 1)
-    multiplier = get_model_multiplier(model_name)
-    return math.ceil((total_tokens / tokens_per_credit) * multiplier)
+    numerator, denominator = (
+        _MODEL_MULTIPLIER_RATIOS.get(model_name, _DEFAULT_MULTIPLIER_RATIO)
+        if model_name
+        else _DEFAULT_MULTIPLIER_RATIO
+    )
+    # Ceiling of total_tokens * multiplier / tokens_per_credit
+    return -(-total_tokens * numerator // (tokens_per_credit * denominator))
 
 
 class BillingService:
@@ -320,20 +608,26 @@ class BillingService:
 
     def get_wallet(self, user_id: str) -> CreditWallet:
         """Fetch or create a wallet for the user."""
-        wallet = billing_repo.get_wallet_by_user_id(self.db, user_id)
-        if not wallet:
-            wallet = billing_repo.create_wallet(self.db, user_id=user_id)
-        return wallet
+        return billing_repo.get_or_create_wallet(self.db, user_id)
 
     def get_subscription(self, user_id: str) -> Subscription | None:
         """Get latest subscription for a user."""
         return billing_repo.get_latest_subscription(self.db, user_id)
 
-    def list_ledger(self, user_id: str, limit: int = 20) -> list[TokenLedger]:
+    def list_ledger(self, user_id: str, limit: int = 20) -> list[RowMapping]:
         """List recent token ledger entries."""
         return billing_repo.list_ledger_entries(self.db, user_id=user_id, limit=limit)
 
-    def get_credit_packs(self) -> list[dict]:
+    def get_summary(
+        self, user_id: str, ledger_limit: int = 20
+    ) -> tuple[CreditWallet, Subscription | None, list[RowMapping]]:
+        """Load wallet, latest subscription and recent ledger."""
+        wallet = self.get_wallet(user_id)
+        subscription = self.get_subscription(user_id)
+        ledger = self.list_ledger(user_id, limit=ledger_limit)
+        return wallet, subscription, ledger
+
+    def get_credit_packs(self) -> list[CreditPackConfig]:
         """Return configured credit packs."""
         return settings.BILLING_CREDIT_PACKS
 
@@ -361,20 +655,35 @@ class BillingService:
         metadata: dict | None = None,
     ) -> TokenLedger:
         """Deduct credits and record token usage."""
-        wallet = self.get_wallet(user_id)
         cost = calculate_cost_credits(total_tokens, model_name)
 
+        # Fast path: the monthly allowance covers the cost (no wallet read)
+        entry = billing_repo.record_monthly_usage(
+            self.db,
+            user_id=user_id,
+            model_name=model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cost_credits=cost,
+            provider_request_id=provider_request_id,
+            metadata=metadata,
+        )
+        if entry is not None:
+            return entry
+
+        wallet = self.get_wallet(user_id)
+
         monthly_deducted = min(wallet.monthly_remaining, cost)
         remaining = cost - monthly_deducted
         prepaid_deducted = min(wallet.prepaid_balance, remaining)
         overage = cost - monthly_deducted - prepaid_deducted
 
-        wallet.monthly_remaining -= monthly_deducted
-        wallet.prepaid_balance -= prepaid_deducted
-        billing_repo.update_wallet(self.db, wallet)
-
-        return billing_repo.create_ledger_entry(
+        return billing_repo.record_usage(
             self.db,
+            wallet=wallet,
+            monthly_deducted=monthly_deducted,
+            prepaid_deducted=prepaid_deducted,
             user_id=user_id,
             model_name=model_name,
             prompt_tokens=prompt_tokens,
@@ -386,24 +695,52 @@ class BillingService:
             metadata=metadata,
         )
 
-    def grant_monthly_allowance(
+    def grant_monthly_allowance_bulk(
+        self,
+        user_ids: Sequence[str],
+        *,
+        provider: str,
+        current_period_start: datetime | None = None,
+        current_period_end: datetime | None = None,
+    ) -> None:
+        """Renew many users at once (e.g. at cycle renewal).
+
+        Monthly credits are reset and subscriptions marked active with one
+        multi-row upsert each, instead of per-user statements.
+        """
+        billing_repo.bulk_set_monthly_remaining(
+            self.db, user_ids=user_ids, credits=settings.BILLING_MONTHLY_CREDITS
+        )
+        billing_repo.bulk_upsert_subscriptions(
+            self.db,
+            user_ids=user_ids,
+            provider=provider,
+            status="active",
+            monthly_credits=settings.BILLING_MONTHLY_CREDITS,
+            current_period_start=current_period_start,
+            current_period_end=current_period_end,
+        )
+
+    def apply_subscription_event(
         self,
         *,
         user_id: str,
         provider: str,
+        external_id: str,
         provider_subscription_id: str | None,
         status: str,
         plan_name: str | None,
         current_period_start: datetime | None,
         current_period_end: datetime | None,
+        amount_minor: int | None,
+        currency: str | None,
         metadata: dict | None,
-    ) -> Subscription:
-        """Grant monthly credits and upsert subscription."""
-        wallet = self.get_wallet(user_id)
-        wallet.monthly_remaining = settings.BILLING_MONTHLY_CREDITS
-        billing_repo.update_wallet(self.db, wallet)
+    ) -> bool:
+        """Record the subscription payment and grant monthly credits, once per external ID.
 
-        return billing_repo.upsert_subscription(
+        Returns False when the event was already recorded.
+        """
+        return billing_repo.record_subscription_event(
             self.db,
             user_id=user_id,
             provider=provider,
@@ -413,6 +750,9 @@ class BillingService:
             monthly_credits=settings.BILLING_MONTHLY_CREDITS,
             current_period_start=current_period_start,
             current_period_end=current_period_end,
+            external_id=external_id,
+            amount_minor=amount_minor,
+            currency=currency,
             metadata=metadata,
         )
 
@@ -423,59 +763,31 @@ class BillingService:
         provider: str,
         external_id: str,
         credits: int,
-        amount: float | None,
+        amount_minor: int | None,
         currency: str | None,
         metadata: dict | None,
-    ) -> None:
-        """Add prepaid credits and record transaction."""
-        existing = billing_repo.get_transaction_by_external_id(self.db, external_id)
-        if existing:
-            return
+    ) -> bool:
+        """Record the transaction and add prepaid credits, once per external ID.
 
-        wallet = self.get_wallet(user_id)
-        wallet.prepaid_balance += credits
-        billing_repo.update_wallet(self.db, wallet)
-
-        billing_repo.create_transaction(
+        Returns False when the event was already recorded.
+        """
+        inserted = billing_repo.create_transaction_if_new(
             self.db,
             user_id=user_id,
             provider=provider,
             external_id=external_id,
             kind="credit_pack",
             status="completed",
-            amount=amount,
+            amount_minor=amount_minor,
             currency=currency,
             credits_granted=credits,
             metadata=metadata,
         )
+        if not inserted:
+            return False
 
-    def record_subscription_payment(
-        self,
-        *,
-        user_id: str,
-        provider: str,
-        external_id: str,
-        amount: float | None,
-        currency: str | None,
-        metadata: dict | None,
-    ) -> None:
-        """Record a subscription payment transaction."""
-        existing = billing_repo.get_transaction_by_external_id(self.db, external_id)
-        if existing:
-            return
-
-        billing_repo.create_transaction(
-            self.db,
-            user_id=user_id,
-            provider=provider,
-            external_id=external_id,
-            kind="subscription",
-            status="completed",
-            amount=amount,
-            currency=currency,
-            credits_granted=settings.BILLING_MONTHLY_CREDITS,
-            metadata=metadata,
-        )
+        billing_repo.add_prepaid_credits(self.db, user_id=user_id, credits=credits)
+        return True
 
     def create_checkout(
         self,
@@ -498,17 +810,10 @@ class BillingService:
         elif kind == "credit_pack":
             if pack_credits is None:
                 raise BadRequestError(message="pack_credits is required for credit_pack checkout")
-            pack = next(
-                (
-                    item
-                    for item in settings.BILLING_CREDIT_PACKS
-                    if int(item.get("credits", 0)) == int(pack_credits)
-                ),
-                None,
-            )
+            pack = _PACKS_BY_CREDITS.get(int(pack_credits))
             if not pack:
                 raise BadRequestError(message="Unknown credit pack selected")
-            product_id = pack.get("provider_product_id") or ""
+            product_id = pack.provider_product_id
             if not product_id:
                 raise BadRequestError(message="Credit pack product_id is not configured")
         else:
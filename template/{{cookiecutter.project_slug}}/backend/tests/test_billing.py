@@ -0,0 +1,335 @@
+{%- if cookiecutter.enable_billing and cookiecutter.use_postgresql and cookiecutter.use_sqlalchemy %}
+"""Tests for the billing service."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+{%- if cookiecutter.enable_redis %}
+
+from app.services.billing import (
+    BillingService,
+    WebhookBatcher,
+    invalidate_available_credits,
+    webhook_batcher,
+)
+{%- else %}
+
+from app.services.billing import BillingService, WebhookBatcher, webhook_batcher
+{%- endif %}
+
+
+class HandlerCrash(BaseException):
+    """BaseException that is not an Exception, like task cancellation."""
+
+
+class FakeSession:
+    """Stand-in session whose savepoints do nothing."""
+
+    @asynccontextmanager
+    async def begin_nested(self) -> AsyncIterator[None]:
+        yield
+
+
+@pytest.fixture
+def fake_db_context():
+    """Patch the batcher's database context with a fake session."""
+
+    @asynccontextmanager
+    async def get_db_context() -> AsyncIterator[FakeSession]:
+        yield FakeSession()
+
+    with patch("app.services.billing.get_db_context", get_db_context):
+        yield
+
+
+class TestBillingService:
+    """Tests for BillingService usage and payment handling."""
+
+    @pytest.fixture
+    def mock_db(self) -> AsyncMock:
+        """Create mock database session."""
+        return AsyncMock()
+{%- if cookiecutter.enable_redis %}
+
+    @pytest.fixture
+    def mock_redis(self) -> AsyncMock:
+        """Create mock Redis client."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def billing_service(self, mock_db: AsyncMock, mock_redis: AsyncMock) -> BillingService:
+        """Create BillingService instance with mock db and Redis."""
+        return BillingService(mock_db, redis=mock_redis)
+{%- else %}
+
+    @pytest.fixture
+    def billing_service(self, mock_db: AsyncMock) -> BillingService:
+        """Create BillingService instance with mock db."""
+        return BillingService(mock_db)
+{%- endif %}
+
+{%- if cookiecutter.enable_redis %}
+
+    @pytest.mark.anyio
+    async def test_get_available_credits_cache_hit(self, billing_service: BillingService):
+        """Test a value tagged with the current generation is served from Redis."""
+        billing_service.redis.raw.mget = AsyncMock(return_value=["3", "3:42"])
+        with patch("app.services.billing.billing_repo") as mock_repo:
+            mock_repo.get_or_create_wallet = AsyncMock()
+
+            assert await billing_service.get_available_credits(uuid4()) == 42
+            mock_repo.get_or_create_wallet.assert_not_awaited()
+
+    @pytest.mark.anyio
+    async def test_get_available_credits_ignores_stale_generation(
+        self, billing_service: BillingService
+    ):
+        """Test a value cached before the last invalidation is re-read from the wallet."""
+        billing_service.redis.raw.mget = AsyncMock(return_value=["4", "3:42"])
+        wallet = SimpleNamespace(monthly_remaining=10, prepaid_balance=5)
+        user_id = uuid4()
+        with patch("app.services.billing.billing_repo") as mock_repo:
+            mock_repo.get_or_create_wallet = AsyncMock(return_value=wallet)
+
+            assert await billing_service.get_available_credits(user_id) == 15
+            billing_service.redis.set.assert_awaited_once_with(
+                f"wallet:avail:{user_id}", "4:15", 300
+            )
+
+    @pytest.mark.anyio
+    async def test_invalidate_available_credits_bumps_generation(self):
+        """Test invalidation bumps each user's generation in one pipeline."""
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        redis = MagicMock()
+        redis.raw.pipeline.return_value.__aenter__.return_value = pipe
+        user_ids = [uuid4(), uuid4()]
+
+        await invalidate_available_credits(redis, *user_ids)
+
+        assert [c.args[0] for c in pipe.incr.call_args_list] == [
+            f"wallet:gen:{user_id}" for user_id in user_ids
+        ]
+        pipe.execute.assert_awaited_once()
+
+    @pytest.mark.anyio
+    async def test_grant_monthly_allowance_bulk_invalidates_after_commit(
+        self, billing_service: BillingService
+    ):
+        """Test the bulk grant retires cached credits only after committing."""
+        calls: list[str] = []
+        billing_service.db.commit = AsyncMock(side_effect=lambda: calls.append("commit"))
+        user_ids = [uuid4(), uuid4()]
+        with (
+            patch("app.services.billing.billing_repo") as mock_repo,
+            patch("app.services.billing.invalidate_available_credits") as mock_invalidate,
+        ):
+            mock_repo.bulk_set_monthly_remaining = AsyncMock()
+            mock_repo.bulk_upsert_subscriptions = AsyncMock()
+            mock_invalidate.side_effect = lambda *args: calls.append("invalidate")
+
+            await billing_service.grant_monthly_allowance_bulk(user_ids, provider="creem")
+
+            assert calls == ["commit", "invalidate"]
+            mock_invalidate.assert_called_once_with(billing_service.redis, *user_ids)
+{%- endif %}
+
+    @pytest.mark.anyio
+    async def test_commit_usage_fast_path(self, billing_service: BillingService):
+        """Test usage covered by the monthly allowance skips the wallet read."""
+        entry = MagicMock()
+        with (
+            patch("app.services.billing.billing_repo") as mock_repo,
+            patch("app.services.billing.calculate_cost_credits", return_value=10),
+        ):
+            mock_repo.record_monthly_usage = AsyncMock(return_value=entry)
+            mock_repo.get_or_create_wallet = AsyncMock()
+            mock_repo.record_usage = AsyncMock()
+
+            result = await billing_service.commit_usage(
+                user_id=uuid4(),
+                model_name=None,
+                prompt_tokens=100,
+                completion_tokens=200,
+                total_tokens=300,
+            )
+
+            assert result is entry
+            assert mock_repo.record_monthly_usage.await_args.kwargs["cost_credits"] == 10
+            mock_repo.get_or_create_wallet.assert_not_awaited()
+            mock_repo.record_usage.assert_not_awaited()
+{%- if cookiecutter.enable_redis %}
+            # The caller invalidates the cache once the usage has committed
+            billing_service.redis.raw.pipeline.assert_not_called()
+{%- endif %}
+
+    @pytest.mark.anyio
+    async def test_commit_usage_slow_path(self, billing_service: BillingService):
+        """Test usage beyond the monthly allowance draws on prepaid credits."""
+        wallet = SimpleNamespace(monthly_remaining=4, prepaid_balance=3)
+        entry = MagicMock()
+        with (
+            patch("app.services.billing.billing_repo") as mock_repo,
+            patch("app.services.billing.calculate_cost_credits", return_value=10),
+        ):
+            mock_repo.record_monthly_usage = AsyncMock(return_value=None)
+            mock_repo.get_or_create_wallet = AsyncMock(return_value=wallet)
+            mock_repo.record_usage = AsyncMock(return_value=entry)
+
+            result = await billing_service.commit_usage(
+                user_id=uuid4(),
+                model_name=None,
+                prompt_tokens=100,
+                completion_tokens=200,
+                total_tokens=300,
+            )
+
+            assert result is entry
+            kwargs = mock_repo.record_usage.await_args.kwargs
+            assert kwargs["wallet"] is wallet
+            assert kwargs["monthly_deducted"] == 4
+            assert kwargs["prepaid_deducted"] == 3
+            assert kwargs["overage_credits"] == 3
+            assert kwargs["cost_credits"] == 10
+
+    @pytest.mark.anyio
+    async def test_apply_pack_purchase_grants_credits(self, billing_service: BillingService):
+        """Test a new pack purchase adds prepaid credits."""
+        user_id = uuid4()
+        with patch("app.services.billing.billing_repo") as mock_repo:
+            mock_repo.create_transaction_if_new = AsyncMock(return_value=True)
+            mock_repo.add_prepaid_credits = AsyncMock()
+
+            applied = await billing_service.apply_pack_purchase(
+                user_id=user_id,
+                provider="creem",
+                external_id="evt_1",
+                credits=500,
+                amount_minor=1000,
+                currency="USD",
+                metadata=None,
+            )
+
+            assert applied is True
+            mock_repo.add_prepaid_credits.assert_awaited_once_with(
+                billing_service.db, user_id=user_id, credits=500
+            )
+
+    @pytest.mark.anyio
+    async def test_apply_pack_purchase_ignores_duplicate_event(
+        self, billing_service: BillingService
+    ):
+        """Test a redelivered webhook does not grant credits twice."""
+        with patch("app.services.billing.billing_repo") as mock_repo:
+            mock_repo.create_transaction_if_new = AsyncMock(return_value=False)
+            mock_repo.add_prepaid_credits = AsyncMock()
+
+            applied = await billing_service.apply_pack_purchase(
+                user_id=uuid4(),
+                provider="creem",
+                external_id="evt_1",
+                credits=500,
+                amount_minor=1000,
+                currency="USD",
+                metadata=None,
+            )
+
+            assert applied is False
+            mock_repo.add_prepaid_credits.assert_not_awaited()
+
+
+class TestWebhookBatcher:
+    """Tests for WebhookBatcher lifecycle and error handling."""
+
+    @pytest.mark.anyio
+    async def test_submit_returns_handler_result(self, fake_db_context):
+        """Test a submitted handler's result is returned after the commit."""
+        batcher = WebhookBatcher(flush_interval=0.01)
+        batcher.start()
+        try:
+            assert await batcher.submit(AsyncMock(return_value="ok")) == "ok"
+        finally:
+            await batcher.stop()
+
+    @pytest.mark.anyio
+    async def test_submit_requires_start(self):
+        """Test submitting to a batcher that is not running raises."""
+        batcher = WebhookBatcher()
+
+        with pytest.raises(RuntimeError, match="not running"):
+            await batcher.submit(AsyncMock())
+
+    @pytest.mark.anyio
+    async def test_failing_handler_fails_only_its_own_event(self, fake_db_context):
+        """Test a handler error is raised to its submitter and the batch still commits."""
+        batcher = WebhookBatcher(flush_interval=0.05)
+        batcher.start()
+        try:
+            results = await asyncio.gather(
+                batcher.submit(AsyncMock(side_effect=ValueError("bad event"))),
+                batcher.submit(AsyncMock(return_value="ok")),
+                return_exceptions=True,
+            )
+        finally:
+            await batcher.stop()
+
+        assert isinstance(results[0], ValueError)
+        assert results[1] == "ok"
+
+    @pytest.mark.anyio
+    async def test_base_exception_resolves_every_pending_submitter(self, fake_db_context):
+        """Test a handler raising BaseException leaves no submitter waiting."""
+
+        async def crash(db: FakeSession) -> None:
+            raise HandlerCrash
+
+        batcher = WebhookBatcher(flush_interval=0.05)
+        batcher.start()
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                batcher.submit(crash),
+                batcher.submit(AsyncMock(return_value="ok")),
+                return_exceptions=True,
+            ),
+            timeout=5,
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert isinstance(results[0].__cause__, HandlerCrash)
+        assert not batcher.running
+        with pytest.raises(RuntimeError, match="not running"):
+            await batcher.submit(AsyncMock())
+        await batcher.stop()
+
+    def test_lifespan_restarts_batcher_on_each_event_loop(self, fake_db_context):
+        """Test the batcher works across two lifespans on separate event loops."""
+        from app.main import app
+
+        async def run_lifespan() -> None:
+            async with app.router.lifespan_context(app):
+                handler = AsyncMock(return_value="ok")
+                assert await asyncio.wait_for(webhook_batcher.submit(handler), timeout=5) == "ok"
+            assert not webhook_batcher.running
+{%- if cookiecutter.enable_redis %}
+
+        redis_client = MagicMock(connect=AsyncMock(), close=AsyncMock())
+{%- endif %}
+
+        with (
+{%- if cookiecutter.enable_redis %}
+            patch("app.main.RedisClient", return_value=redis_client),
+{%- endif %}
+{%- if cookiecutter.enable_logfire %}
+            patch("app.core.logfire_setup.logfire"),
+{%- endif %}
+            patch("app.billing.providers.creem.close_clients", new_callable=AsyncMock),
+            patch("app.db.session.close_db", new_callable=AsyncMock),
+        ):
+            asyncio.run(run_lifespan())
+            asyncio.run(run_lifespan())
+{%- endif %}